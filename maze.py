@@ -60,12 +60,30 @@ them woould be discarded as "off grid" anyway.
 
 """
 
+import os
 import sys
 import random
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 
 __all__ = [ 'Maze' ]
 
+# np.bitwise_count arrived in NumPy 2.0.  For older NumPy fall back to
+# a small table of popcounts covering the DIR bits.  (The table is set
+# up after the class body below because it needs the Maze constants.)
+try:
+    _bitwise_count = np.bitwise_count
+except AttributeError:
+    _bitwise_count = None
+
+# Numba is optional.  When it is available, and nobody is watching
+# events, the Wilson walk runs as a compiled kernel over the flat cell
+# buffer instead of the pure-Python walk.
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 class Direction:
     def __init__(self,val,opposite,name,deltas):
         self.val = val
@@ -97,6 +115,10 @@ class Maze:
     DIR = DIR | (U := (_ := _ * 2))
     DIR = DIR | (D := (_ := _ * 2))
     del _
+    # every bit a cell can hold; 14 bits, so a uint16 array is enough.
+    # Clearing bits is written "cells &= Maze.ALLBITS ^ mask" because
+    # plain ~mask is negative and an unsigned array will not accept it.
+    ALLBITS = STATE | DIR
 
     def wilsons_generate(self, log=None, callback = None):
 
@@ -104,17 +126,14 @@ class Maze:
             # used to clean up loops
             def clearpath(start,end):
                 while start != end:
-                    direction = self.cells[start] & Maze.DIR
-                    self.cells[start] &= ~Maze.DIR
+                    direction = fcells[start] & Maze.DIR
+                    fcells[start] &= Maze.ALLBITS ^ Maze.DIR
                     # been there so no need to check for out of bounds
-                    neigh = tuple(map(
-                        lambda i, j: i + j,
-                        start,
-                        self.compass[direction].deltas
-                    ))
-                    self.event(event="clear-cell",
-                        cell=self.cells[start],
-                        current=start
+                    neigh = start + \
+                        self._flat_by_bit[int(direction).bit_length() - 1]
+                    self._quiet or self.event(event="clear-cell",
+                        cell=fcells[start],
+                        current=unflat(start)
                     )
                     start = neigh
             def markpath(start,end):
@@ -122,174 +141,288 @@ class Maze:
                 # this is used to "remember" how to go back the other way
                 opposite = 0
                 while start != end:
-                    direction = self.cells[start] & Maze.DIR
+                    idx = int(fcells[start] & Maze.DIR).bit_length() - 1
                     # record the opposite direction and mark as in the maze
-                    self.cells[start] |= (opposite | Maze.INMAZE)
+                    fcells[start] |= (opposite | Maze.INMAZE)
+                    finmaze[start] = True
+                    claim(start)
                     # save opposite for next cell
-                    opposite = self.compass[direction].opposite
+                    opposite = self._opposite_by_bit[idx]
                     # been there so no need to check for out of bounds
-                    neigh = tuple(map(
-                        lambda i, j: i + j,
-                        start,
-                        self.compass[direction].deltas
-                    ))
-                    self.event(event="mark-cell",
-                        cell=self.cells[start],
-                        current=start,
+                    neigh = start + self._flat_by_bit[idx]
+                    self._quiet or self.event(event="mark-cell",
+                        cell=fcells[start],
+                        current=unflat(start),
                     )
                     start = neigh
-                self.cells[end] |= opposite
-
-            directions = list(self.compass.keys())
+                fcells[end] |= opposite
 
-            self.event(event="walk-start",
-                cell=self.cells[start],
-                current=start
+            self._quiet or self.event(event="walk-start",
+                cell=fcells[start],
+                current=unflat(start)
             )
             current = start
             walking = True
             while walking:
-                # pick a neighbor
-                direction = directions[self.rand.integers(len(directions))]
-                # coordinates of neighbor
-                neigh = tuple(map(
-                    lambda i, j: i + j,
-                    current,
-                    self.compass[direction].deltas
-                ))
-                if not self.inbound(neigh) or (self.cells[neigh] & Maze.HIDDEN):
+                # pick a neighbor from the directions that stay on the
+                # grid -- no rejected off-grid draws.  The modulo bias
+                # against 1 << 16 is negligible.
+                legal = self._legal_by_mask[int(fvalid[current])]
+                chosen, step = legal[self._rand_raw() % len(legal)]
+                direction = chosen.val
+                # flat index of neighbor -- the whole walk runs on flat
+                # indices; tuple coords are rebuilt only for events
+                neigh = current + step
+                if fhidden[neigh]:
                     # go back and try another direction
                     continue
 
                 # did we find a maze cell?
-                if self.cells[neigh] & Maze.INMAZE:
+                if finmaze[neigh]:
                     # record what direction we went
-                    self.cells[current] &= ~Maze.DIR
-                    self.cells[current] |= direction
-                    self.event(event="walk-end",
+                    fcells[current] &= Maze.ALLBITS ^ Maze.DIR
+                    fcells[current] |= direction
+                    self._quiet or self.event(event="walk-end",
                         cells=(
-                            self.cells[current],
-                            self.cells[neigh]
+                            fcells[current],
+                            fcells[neigh]
                         ),
-                        current=current,
-                        neighbor=neigh,
+                        current=unflat(current),
+                        neighbor=unflat(neigh),
                     )
                     markpath(start,neigh)
                     # we are done
                     walking = False
                 # or did we loop?
-                elif self.cells[neigh] & Maze.DIR:
-                    self.event(event="walk-loop",
+                elif fcells[neigh] & Maze.DIR:
+                    self._quiet or self.event(event="walk-loop",
                         cells=(
-                            self.cells[current],
-                            self.cells[neigh]
+                            fcells[current],
+                            fcells[neigh]
                         ),
-                        current=current,
-                        neighbor=neigh,
+                        current=unflat(current),
+                        neighbor=unflat(neigh),
                     )
                     # record what direction we went
-                    self.cells[current] &= ~Maze.DIR
-                    self.cells[current] |= direction
+                    fcells[current] &= Maze.ALLBITS ^ Maze.DIR
+                    fcells[current] |= direction
                     # clean up the loop and continue from here
                     clearpath(neigh,current)
                     # forget the direction from last try
-                    self.cells[current] &= ~Maze.DIR
+                    fcells[current] &= Maze.ALLBITS ^ Maze.DIR
                     current = neigh
                 # else we need to keep looking
                 else:
                     # record what direction we went and continue
-                    self.cells[current] &= ~Maze.DIR
-                    self.cells[current] |= direction
-                    self.event(event="walk-step",
+                    fcells[current] &= Maze.ALLBITS ^ Maze.DIR
+                    fcells[current] |= direction
+                    self._quiet or self.event(event="walk-step",
                         cells=(
-                            self.cells[current],
-                            self.cells[neigh]
+                            fcells[current],
+                            fcells[neigh]
                         ),
-                        current=current,
-                        neighbor=neigh,
+                        current=unflat(current),
+                        neighbor=unflat(neigh),
                     )
                     current = neigh
 
             # we are done
-            self.event(event="walked")
+            self._quiet or self.event(event="walked")
 
         self.log = log
         self.callback = callback
+        # nobody listening means the hot loops can skip event calls
+        self._quiet = log is None and callback is None
 
         self.clean()
-        
+
         self.event(event="generating")
 
-        empties = ((self.cells & Maze.INUSE) == 0).nonzero()
+        # flat views of the state; the walk never touches a tuple index
+        shape = self.cells.shape
+        fcells = self.cells.reshape(-1)
+        fhidden = self.hidden.reshape(-1)
+        finmaze = self.inmaze.reshape(-1)
+        fvalid = self._valid_dirs.reshape(-1)
+
+        def unflat(flat):
+            # tuple coordinate for event consumers
+            return tuple(int(c) for c in np.unravel_index(flat, shape))
+
+        # The empty cells, tracked as flat indices and swap-removed as
+        # walks claim cells, so nothing rescans the whole grid.
+        empty_flat = np.flatnonzero(~(fhidden | finmaze))
+        n_empty = len(empty_flat)
+        # where each cell sits in empty_flat (or -1 once claimed)
+        empty_pos = np.full(fcells.size, -1, dtype=np.int64)
+        empty_pos[empty_flat] = np.arange(n_empty)
+
+        def claim(flat):
+            # swap-remove a newly-claimed cell from the empty list
+            nonlocal n_empty
+            pos = empty_pos[flat]
+            if pos < 0:
+                return
+            n_empty -= 1
+            last = empty_flat[n_empty]
+            empty_flat[pos] = last
+            empty_pos[last] = pos
+            empty_pos[flat] = -1
+
+        def pick_empty():
+            return int(empty_flat[self.rand.integers(n_empty)])
+
+        # When numba is available, and nobody is listening for events,
+        # replace walk() with a thin wrapper around a compiled kernel.
+        # The overwhelmingly common 2D orthogonal maze gets its own
+        # kernel with the four directions baked in.
+        if njit is not None and self._quiet and len(shape) == 2 \
+                and set(self._dir_keys) == {Maze.N, Maze.E, Maze.S, Maze.W}:
+            (width, height) = shape
+            def walk(start):
+                nonlocal n_empty
+                x, y = divmod(start, height)
+                n_empty = _wilson_walk_2d(
+                    fcells, width, height,
+                    x, y, self.rand,
+                    empty_flat, empty_pos, n_empty)
+        elif njit is not None and self._quiet:
+            deltas = self._deltas_arr.astype(np.int64)
+            kernel_args = (
+                fcells,
+                np.array(shape, dtype=np.int64),
+                deltas,
+                deltas @ self._strides,
+                np.array([d.val for d in self._dir_list],
+                    dtype=np.int64),
+                np.array([d.opposite for d in self._dir_list],
+                    dtype=np.int64),
+            )
+            def walk(start):
+                nonlocal n_empty
+                coord = np.array(np.unravel_index(start, shape),
+                    dtype=np.int64)
+                n_empty = _wilson_walk(*kernel_args,
+                    start, coord,
+                    Maze.INMAZE, Maze.HIDDEN, Maze.DIR, self.rand,
+                    empty_flat, empty_pos, n_empty)
+
         # if maze is empty
-        if empties[0].size:
+        if n_empty:
             # we need at least one cell in the maze
             # pick an empty
-            emlist = list(zip(*empties))
-            coord = emlist[self.rand.integers(len(emlist))]
-            self.cells[coord] = Maze.INMAZE
-            self.event(event="mark-cell",
-                cell=self.cells[coord],
-                current=coord
+            flat = pick_empty()
+            fcells[flat] = Maze.INMAZE
+            finmaze[flat] = True
+            claim(flat)
+            self._quiet or self.event(event="mark-cell",
+                cell=fcells[flat],
+                current=unflat(flat)
             )
-            # update the lists
-            empties = ((self.cells & Maze.INUSE) == 0).nonzero()
 
         # while there are empty cells
-        while empties[0].size:
+        while n_empty:
             # pick a cell to start a walk
-            emlist = list(zip(*empties))
-            coord = emlist[self.rand.integers(len(emlist))]
-            walk(coord)
-            # update the list
-            empties = ((self.cells & Maze.INUSE) == 0).nonzero()
+            walk(pick_empty())
+        # the kernels only update the packed cells; resync the plane
+        np.not_equal(self.cells & Maze.INMAZE, 0, out=self.inmaze)
         self.event(event="generated")
 
     def recursive_generate(self, log=None, callback = None):
         self.log = log
         self.callback = callback
+        # nobody listening means the hot loops can skip event calls
+        self._quiet = log is None and callback is None
 
         self.clean()
 
         self.event(event="generating")
 
-        empties = ((self.cells & Maze.INUSE) == 0).nonzero()
+        shape = self.cells.shape
+        empty_flat = np.flatnonzero(~(self.hidden | self.inmaze).reshape(-1))
+        if njit is not None and self._quiet:
+            # Nobody listening: run the depth-first flood as a
+            # compiled kernel per region, same arrangement as the
+            # Wilson walk kernels.
+            fcells = self.cells.reshape(-1)
+            deltas = self._deltas_arr.astype(np.int64)
+            kernel_args = (
+                fcells,
+                np.array(shape, dtype=np.int64),
+                deltas,
+                deltas @ self._strides,
+                np.array([d.val for d in self._dir_list],
+                    dtype=np.int64),
+                np.array([d.opposite for d in self._dir_list],
+                    dtype=np.int64),
+            )
+            while empty_flat.size:
+                flat = int(empty_flat[self.rand.integers(empty_flat.size)])
+                coord = np.array(np.unravel_index(flat, shape),
+                    dtype=np.int64)
+                _recurse_gen(*kernel_args, flat, coord,
+                    Maze.INMAZE, Maze.HIDDEN, self.rand)
+                # the kernel floods a whole region; keep only the
+                # cells it left unclaimed
+                empty_flat = empty_flat[
+                    (fcells[empty_flat] & Maze.INMAZE) == 0]
+            # the kernel only updates the packed cells
+            np.not_equal(self.cells & Maze.INMAZE, 0, out=self.inmaze)
+            self.event(event="generated")
+            return
         # While there are empty cells
-        while empties[0].size:
-            emlist = list(zip(*empties))
+        while empty_flat.size:
             # pick a random empty
-            current = emlist[self.rand.integers(len(emlist))]
+            flat = empty_flat[self.rand.integers(empty_flat.size)]
+            current = tuple(int(c) for c in np.unravel_index(flat, shape))
             self.recurse_gen(current)
-            # update the list
-            empties = ((self.cells & Maze.INUSE) == 0).nonzero()
+            # recurse_gen floods a whole region; keep only the cells it
+            # left empty instead of rescanning the grid
+            empty_flat = empty_flat[~self.inmaze.reshape(-1)[empty_flat]]
         self.event(event="generated")
 
     def recurse_gen(self, current):
+        # Depth first as before, but on an explicit stack instead of
+        # actual recursion: no Python frame per cell and no chance of
+        # hitting the recursion limit on a big grid.
         self.cells[current] |= Maze.INMAZE
-        self.event(event="mark-cell",
+        self.inmaze[current] = True
+        self._quiet or self.event(event="mark-cell",
             cell=self.cells[current],
             current=current,
         )
-        directions = list(self.compass.keys())
-        self.rand.shuffle(directions)
-        for direction in directions:
-            neigh = tuple(map(
-                lambda i, j: i + j,
-                current,
-                self.compass[direction].deltas
-            ))
-            if not self.inbound(neigh) or (self.cells[neigh] & Maze.INUSE):
-                # go back and try another direction
-                continue
-            # Empty.  Claim it, remember the direction we went and recurse.
-            self.cells[current] |= direction
-            self.event(event="mark-cell",
-                cell=self.cells[current],
-                current=current,
-            )
-            opposite = self.compass[direction].opposite
-            self.cells[neigh] |= (Maze.INMAZE | opposite)
-            self.recurse_gen(neigh)
+        stack = [(current, iter(self._rand_perm()))]
+        while stack:
+            current, directions = stack[-1]
+            valid = self._valid_dirs[current]
+            for idx in directions:
+                chosen = self._dir_list[idx]
+                if not (chosen.val & valid):
+                    # off the grid; go back and try another direction
+                    continue
+                neigh = tuple(c + d for c, d in
+                    zip(current, chosen.deltas))
+                if self.hidden[neigh] or self.inmaze[neigh]:
+                    # go back and try another direction
+                    continue
+                # Empty.  Claim it, remember the direction we went
+                # and descend into the neighbor.
+                self.cells[current] |= chosen.val
+                self._quiet or self.event(event="mark-cell",
+                    cell=self.cells[current],
+                    current=current,
+                )
+                self.cells[neigh] |= (Maze.INMAZE | chosen.opposite)
+                self.inmaze[neigh] = True
+                self._quiet or self.event(event="mark-cell",
+                    cell=self.cells[neigh],
+                    current=neigh,
+                )
+                stack.append((neigh, iter(self._rand_perm())))
+                break
+            else:
+                # no unvisited neighbors left; back up
+                stack.pop()
 
     def random_start(self, start=None):
         # if start is not given, choose random from left of highest level
@@ -303,17 +436,15 @@ class Maze:
             )
             return coord
         coord = list(coord)
-        possible = []
-        for coord[0] in range(shape[0]):
-            if not (self.cells[tuple(coord)] & Maze.HIDDEN):
-                possible.append(coord.copy())
-        if len(possible) == 0:
+        # scan the whole face in one vectorized pass
+        face = self.cells[(slice(None),) + tuple(coord[1:])]
+        possible = np.flatnonzero((face & Maze.HIDDEN) == 0)
+        if possible.size == 0:
             # Why would someone make all the cells hidden?
             # In that case, I don't care if it is
             coord[0] = 0
         else:
-            self.rand.shuffle(possible)
-            coord = possible[0]
+            coord[0] = int(self.rand.choice(possible))
         coord = tuple(coord)
         self.event(event="random-start",
             start=coord
@@ -332,18 +463,16 @@ class Maze:
             )
             return coord
         coord = list(coord)
-        possible = []
         maxx = coord[0]
-        for coord[0] in range(shape[0]):
-            if not (self.cells[tuple(coord)] & Maze.HIDDEN):
-                possible.append(coord.copy())
-        if len(possible) == 0:
+        # scan the whole face in one vectorized pass
+        face = self.cells[(slice(None),) + tuple(coord[1:])]
+        possible = np.flatnonzero((face & Maze.HIDDEN) == 0)
+        if possible.size == 0:
             # Why would someone make all the cells hidden?
             # In that case, I don't care if it is
             coord[0] = maxx
         else:
-            self.rand.shuffle(possible)
-            coord = possible[0]
+            coord[0] = int(self.rand.choice(possible))
         coord = tuple(coord)
         self.event(event="random-end",
             end=coord
@@ -353,66 +482,196 @@ class Maze:
     def mouse_solve(self, log=None, callback = None, start=None, end=None):
         self.log = log
         self.callback = callback
+        # nobody listening means the hot loops can skip event calls
+        self._quiet = log is None and callback is None
         start = self.random_start(start = start)
         end = self.random_end(end = end)
         pass
     def deadend_solve(self, log=None, callback = None, start=None, end=None):
         def countdoors(cell):
-            return len(self.bits(cell & Maze.DIR))
-        def backfill(thecopy,dead):
+            # a single popcount instruction on 3.10+
+            return int(cell & Maze.DIR).bit_count()
+        def backfill(thecopy,dead,lo=None,hi=None):
+            # lo/hi bound the rows this call may touch; a chain that
+            # would cross out of them is handed back for the caller
+            # to finish serially
             while countdoors(thecopy[dead]) == 1:
-                thecopy[dead] |= Maze.NOTSOLUTION
-                self.event(event="dead-end",
+                direction = thecopy[dead] & Maze.DIR
+                idx = int(direction).bit_length() - 1
+                opposite = self._opposite_by_bit[idx]
+                # coordinates of neighbor
+                neigh = tuple(c + d for c, d in
+                    zip(dead, self._delta_by_bit[idx]))
+                if lo is not None and not (lo <= neigh[0] < hi):
+                    return dead
+                filled[dead] = True
+                self._quiet or self.event(event="dead-end",
                     current=dead,
                     cell=self.cells[dead]
                 )
-                direction = thecopy[dead] & Maze.DIR
-                opposite = self.compass[direction].opposite
-                # coordinates of neighbor
-                neigh = tuple(map(
-                    lambda i, j: i + j,
-                    dead,
-                    self.compass[direction].deltas
-                ))
                 # close the doors
-                thecopy[dead] &= ~direction
-                thecopy[neigh] &= ~(opposite)
+                thecopy[dead] &= Maze.ALLBITS ^ direction
+                thecopy[neigh] &= Maze.ALLBITS ^ opposite
                 dead = neigh
                 if dead in (start, end):
                     break
+            return None
 
         self.log = log
         self.callback = callback
+        # nobody listening means the hot loops can skip event calls
+        self._quiet = log is None and callback is None
         start = self.random_start(start = start)
         end = self.random_end(end = end)
 
-        # copy the cells because we are going to temporarily close doors
-        thecopy = np.copy(self.cells)
+        # we are going to temporarily close doors, so work on a copy of
+        # just the DIR bits; backfilled cells are tracked separately
+        np.not_equal(self.cells & Maze.HIDDEN, 0, out=self.hidden)
+        thecopy = self.cells & Maze.DIR
+        filled = np.zeros(self.cells.shape, dtype=bool)
+
+        # On a big enough maze, with nobody watching events, spread the
+        # backfill over row slabs in a thread pool.  Each slab only
+        # touches its own rows (chains that would cross a boundary are
+        # finished serially afterwards), and dead-end filling reaches
+        # the same solution whatever the order.
+        nthreads = 0
+        if self._quiet and thecopy.size >= (1 << 15):
+            nthreads = min(os.cpu_count() or 1, thecopy.shape[0] // 16)
+        pool = None
+        if nthreads > 1:
+            pool = ThreadPoolExecutor(max_workers=nthreads)
+            bounds = np.linspace(0, thecopy.shape[0], nthreads + 1,
+                dtype=int)
+
+        def sweep(deads,lo,hi):
+            crossers = []
+            for dead in deads:
+                left = backfill(thecopy,dead,lo,hi)
+                if left is not None:
+                    crossers.append(left)
+            return crossers
 
         # look for cells with only one door
-        while True:
-            counts = np.zeros_like(thecopy)
-            for coord in zip(*np.nonzero(thecopy & Maze.DIR)):
-                counts[coord] = countdoors(thecopy[coord])
-            deadends = (counts == 1).nonzero()
-            deadlist = list(filter(
-                lambda x: x != start and x != end,
-                zip(*deadends)
-            ))
-            if len(deadlist) == 0:
-                break
-            # we shuffle to make it interesting for anyone watching
-            self.rand.shuffle(deadlist)
-            for dead in deadlist:
-                backfill(thecopy,dead)
-
-        # whats left must be the solution
-        solution = ((thecopy & (Maze.NOTSOLUTION|Maze.HIDDEN)) == 0).nonzero()
-        for coord in zip(*solution):
-            self.event(event="solution",
-                current=coord,
-                cell=self.cells[coord]
-            )
+        try:
+            while True:
+                # thecopy holds nothing but DIR bits, so its popcount
+                # is the door count; one fused pass, no temporaries
+                deadends = np.argwhere(_bitwise_count(thecopy) == 1)
+                # leave the start and end cells alone
+                keep = ~(
+                    (deadends == start).all(axis=1)
+                    | (deadends == end).all(axis=1)
+                )
+                deadlist = [tuple(coord) for coord in deadends[keep]]
+                if len(deadlist) == 0:
+                    break
+                # we shuffle to make it interesting for anyone watching
+                self.rand.shuffle(deadlist)
+                if pool is not None:
+                    futures = [
+                        pool.submit(sweep,
+                            [d for d in deadlist
+                                if bounds[i] <= d[0] < bounds[i + 1]],
+                            bounds[i], bounds[i + 1])
+                        for i in range(nthreads)
+                    ]
+                    # collect the boundary crossers from every slab
+                    # before backfilling any of them: an unbounded
+                    # chain may walk into a slab another worker is
+                    # still mutating, and the &= updates are not atomic
+                    crossers = []
+                    for future in futures:
+                        crossers.extend(future.result())
+                    for dead in crossers:
+                        backfill(thecopy,dead)
+                else:
+                    for dead in deadlist:
+                        backfill(thecopy,dead)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # whats left must be the solution; record it in the cells too
+        solution_mask = (thecopy != 0) & ~filled & ~self.hidden
+        self.cells[solution_mask] |= Maze.SOLUTION
+        if not self._quiet:
+            for coord in np.argwhere(solution_mask):
+                coord = tuple(coord)
+                self.event(event="solution",
+                    current=coord,
+                    cell=self.cells[coord]
+                )
+        self.event(event="solved",
+            start=start,
+            end=end
+        )
+
+    def bfs_solve(self, log=None, callback = None, start=None, end=None):
+        self.log = log
+        self.callback = callback
+        # nobody listening means the hot loops can skip event calls
+        self._quiet = log is None and callback is None
+        start = self.random_start(start = start)
+        end = self.random_end(end = end)
+
+        # Breadth first over the flat cell buffer.  Door bits are
+        # symmetric and never point off the grid, so following them
+        # needs no bounds checks; parent pointers double as the
+        # visited set (-2 unvisited, -1 the start) and are all that is
+        # needed to rebuild the shortest path.
+        shape = self.cells.shape
+        fcells = self.cells.reshape(-1)
+        start_flat = int(np.ravel_multi_index(start, shape))
+        end_flat = int(np.ravel_multi_index(end, shape))
+        parent = np.full(fcells.size, -2, dtype=np.int64)
+        queue = np.empty(fcells.size, dtype=np.int64)
+        flat_steps = np.array(self._flat_by_bit, dtype=np.int64)
+
+        if njit is not None and self._quiet:
+            _bfs_solve(fcells, parent, queue, flat_steps,
+                Maze.DIR, start_flat, end_flat)
+        else:
+            def unflat(flat):
+                return tuple(int(c) for c in
+                    np.unravel_index(flat, shape))
+            flat_by_bit = self._flat_by_bit
+            parent[start_flat] = -1
+            queue[0] = start_flat
+            head = 0
+            tail = 1
+            while head < tail:
+                current = int(queue[head])
+                head += 1
+                if current == end_flat:
+                    break
+                doors = int(fcells[current]) & Maze.DIR
+                while doors:
+                    bit = doors & -doors
+                    doors ^= bit
+                    neigh = current + flat_by_bit[bit.bit_length() - 1]
+                    if parent[neigh] == -2:
+                        parent[neigh] = current
+                        queue[tail] = neigh
+                        tail += 1
+                        self._quiet or self.event(event="visit-cell",
+                            current=unflat(neigh),
+                            cell=fcells[neigh]
+                        )
+
+        # walk the parents back from the end and record the path
+        if parent[end_flat] != -2:
+            flat = end_flat
+            while flat >= 0:
+                fcells[flat] |= Maze.SOLUTION
+                if not self._quiet:
+                    coord = tuple(int(c) for c in
+                        np.unravel_index(flat, shape))
+                    self.event(event="solution",
+                        current=coord,
+                        cell=fcells[flat]
+                    )
+                flat = int(parent[flat])
         self.event(event="solved",
             start=start,
             end=end
@@ -489,6 +748,17 @@ See Wikipedia: https://en.wikipedia.org/wiki/Maze_generation_algorithm
 Viewing from above, find all the dead ends and fill them in.  Repeat.
 Anything left is a solution.  This is often how humans will solve maze
 diagrams.
+"""
+        ),
+        (
+            "Breadth First Search",
+            bfs_solve,
+            """
+Explore outward from the start one ring of cells at a time, while
+remembering how each cell was reached.  When the end turns up, walk
+the remembered parents backwards; that chain is the shortest path.
+
+See Wikipedia: https://en.wikipedia.org/wiki/Breadth-first_search
 """
         ),
     ]
@@ -522,17 +792,74 @@ diagrams.
 
     def clean(self):
         # clean up the cells keeping only the hidden cells
-        self.cells &= Maze.HIDDEN
+        np.bitwise_and(self.cells, self._HIDDEN_M, out=self.cells)
+        # resync the boolean planes (callers may have poked HIDDEN
+        # bits straight into the cells)
+        np.not_equal(self.cells & Maze.HIDDEN, 0, out=self.hidden)
+        self.inmaze.fill(False)
+        # drop any pre-drawn randomness so that restarting self.rand
+        # with the same seed replays the same maze
+        self._rnd_idx = self._rnd_pool.size
+        self._perm_idx = len(self._perm_pool)
 
     def unsolve(self):
         # remove only solution data
-        self.cells &= ~(Maze.SOLUTION | Maze.NOTSOLUTION)
+        np.bitwise_and(self.cells, self._KEEPSOL_M, out=self.cells)
 
     def clear(self,shape = None):
-        # all new, empty maze.
+        # all new, empty maze.  ALLBITS fits in 16 bits, so a uint16
+        # array keeps the working set (and every vectorized scan) small.
         self.cells = np.zeros(
             shape if shape is not None else self.cells.shape,
-            dtype=int)
+            dtype=np.uint16)
+        # boolean planes mirroring the HIDDEN and INMAZE bits; one byte
+        # per cell makes the emptiness scans and walk probes cheap.
+        # The packed cells array stays authoritative for display.
+        self.hidden = np.zeros(self.cells.shape, dtype=bool)
+        self.inmaze = np.zeros(self.cells.shape, dtype=bool)
+        # __init__ calls us before the compass exists; it builds the
+        # valid-direction masks itself once it has one
+        if hasattr(self, 'compass'):
+            self._build_valid_dirs()
+
+    def _build_valid_dirs(self):
+        # per-cell bitmask of the directions that stay on the grid, so
+        # the walkers can test one AND instead of calling inbound()
+        shape = self.cells.shape
+        # element strides, so a neighbor is one integer addition on a
+        # flat index instead of building and hashing a coordinate tuple
+        self._strides = np.array(
+            self.cells.strides, dtype=np.int64) // self.cells.itemsize
+        self._flat_by_bit = [0] * 16
+        for direction in self._dir_list:
+            self._flat_by_bit[direction.val.bit_length() - 1] = \
+                int(np.dot(direction.deltas, self._strides))
+        alldirs = 0
+        for val in self._dir_keys:
+            alldirs |= val
+        self._valid_dirs = np.full(shape, alldirs, dtype=np.int32)
+        for direction in self._dir_list:
+            for k, dk in enumerate(direction.deltas):
+                if dk == 0:
+                    continue
+                # mask the direction off along the face it would leave
+                face = [slice(None)] * len(shape)
+                if dk > 0:
+                    face[k] = slice(shape[k] - dk, None)
+                else:
+                    face[k] = slice(None, -dk)
+                self._valid_dirs[tuple(face)] &= ~direction.val
+        # Only a handful of distinct masks occur (interior, faces,
+        # edges, corners); memoize the legal directions per mask so a
+        # walker can draw a legal direction without rejection.
+        # Each entry pairs the direction with its flat-index step;
+        # the Direction objects are shared between mazes so the step
+        # cannot live on them.
+        self._legal_by_mask = {}
+        for mask in np.unique(self._valid_dirs):
+            self._legal_by_mask[int(mask)] = tuple(
+                (d, self._flat_by_bit[d.val.bit_length() - 1])
+                for d in self._dir_list if d.val & mask)
 
     def inbound(self,coord):
         shape = self.cells.shape
@@ -549,6 +876,7 @@ diagrams.
         self.rand = np.random.default_rng()         # alternative RNG
         self.log = None                             # io for logging
         self.callback = None                        # callback on events
+        self._quiet = True                          # skip event plumbing
 
         self.clear(shape)
         n = len(self.cells.shape)
@@ -563,24 +891,354 @@ diagrams.
         self.compass = {}
         for direction in directions:
             self.compass[direction.val] = direction
+        # the hot loops index these instead of going through the compass
+        self._dir_keys = tuple(self.compass.keys())
+        self._dir_list = tuple(self.compass.values())
+        self._deltas_arr = np.array(
+            [d.deltas for d in self._dir_list],
+            dtype=np.int8)
+        # tables indexed by direction bit position, so the path
+        # followers can turn a DIR bit into its opposite and deltas
+        # without a dict lookup per step
+        self._opposite_by_bit = [0] * 16
+        self._delta_by_bit = [None] * 16
+        for direction in self._dir_list:
+            idx = direction.val.bit_length() - 1
+            self._opposite_by_bit[idx] = direction.opposite
+            self._delta_by_bit[idx] = direction.deltas
+        self._build_valid_dirs()
+        # masks pre-typed to the cell dtype so the in-place ufuncs in
+        # clean() and unsolve() neither promote nor allocate
+        self._HIDDEN_M = np.uint16(Maze.HIDDEN)
+        self._KEEPSOL_M = np.uint16(
+            Maze.ALLBITS ^ (Maze.SOLUTION | Maze.NOTSOLUTION))
+        # pre-drawn randomness; see _rand_raw and _rand_perm
+        self._rnd_pool = np.empty(0, dtype=np.uint16)
+        self._rnd_idx = 0
+        self._perm_pool = np.empty((0, 0), dtype=np.intp)
+        self._perm_idx = 0
+
+    # The generators used to draw randomness one value at a time in
+    # their inner loops -- a separate trip into the Generator per step.
+    # Instead we pre-draw blocks and hand values out one at a time.
+    _POOL_SIZE = 4096
+
+    def _rand_raw(self):
+        # one pre-drawn uniform 16-bit value
+        if self._rnd_idx >= self._rnd_pool.size:
+            self._rnd_pool = self.rand.integers(
+                0, 1 << 16,
+                size=self._POOL_SIZE, dtype=np.uint16)
+            self._rnd_idx = 0
+        val = self._rnd_pool[self._rnd_idx]
+        self._rnd_idx += 1
+        return val
+
+    def _rand_perm(self):
+        # one random permutation of the direction indices
+        if self._perm_idx >= len(self._perm_pool):
+            n = len(self._dir_list)
+            self._perm_pool = self.rand.permuted(
+                np.tile(np.arange(n), (max(1, self._POOL_SIZE // n), 1)),
+                axis=1)
+            self._perm_idx = 0
+        perm = self._perm_pool[self._perm_idx]
+        self._perm_idx += 1
+        return perm
 
     def bits(self,n):
-        result = []
-        while n:
-            i = (n - 1) & n
-            result.append(i ^ n)
-            n = i
-        return result
+        # the values of the set bits, lowest first
+        n = int(n)
+        return [1 << i for i in range(n.bit_length()) if n & (1 << i)]
 
     def event(self,**kwargs):
         if self.log is not None:
-            self.log.write(str(kwargs))
-            self.log.write("\n")
-            self.log.flush()
+            # one write, no flush: let the file's buffer decide when
+            # to hit the disk instead of paying a syscall per event
+            self.log.write(str(kwargs) + "\n")
         if self.callback is not None:
             self.callback(**kwargs)
 
 
+if njit is not None:
+    @njit(cache=True)
+    def _wilson_walk(cells, shape, deltas, flat_deltas, dir_vals,
+            opposites, start, coord, inmaze, hidden, dirmask, rand,
+            empty_flat, empty_pos, n_empty):
+        # The state machine of walk() below, over a flat cell buffer
+        # with integer indices.  Events are not emitted here; this
+        # kernel is only used when nobody is listening for them.
+        # Claimed cells are swap-removed from the empty list and the
+        # new count returned.
+        n_dirs = dir_vals.shape[0]
+        ndim = shape.shape[0]
+        current = start
+        while True:
+            # pick a neighbor
+            d = rand.integers(0, n_dirs)
+            inside = True
+            for k in range(ndim):
+                c = coord[k] + deltas[d, k]
+                if c < 0 or c >= shape[k]:
+                    inside = False
+                    break
+            if not inside:
+                # go back and try another direction
+                continue
+            neigh = current + flat_deltas[d]
+            cell = cells[neigh]
+            if cell & hidden:
+                continue
+            # did we find a maze cell?
+            if cell & inmaze:
+                # record what direction we went
+                cells[current] = (cells[current] & ~dirmask) | dir_vals[d]
+                # mark the path from the walk start into the maze
+                p = start
+                opposite = 0
+                while p != neigh:
+                    dirbit = cells[p] & dirmask
+                    for k in range(n_dirs):
+                        if dir_vals[k] == dirbit:
+                            cells[p] |= opposite | inmaze
+                            # swap-remove p from the empty list
+                            pos = empty_pos[p]
+                            if pos >= 0:
+                                n_empty -= 1
+                                last = empty_flat[n_empty]
+                                empty_flat[pos] = last
+                                empty_pos[last] = pos
+                                empty_pos[p] = -1
+                            opposite = opposites[k]
+                            p += flat_deltas[k]
+                            break
+                cells[neigh] |= opposite
+                # we are done
+                return n_empty
+            # or did we loop?
+            elif cell & dirmask:
+                # record what direction we went
+                cells[current] = (cells[current] & ~dirmask) | dir_vals[d]
+                # clean up the loop and continue from here
+                p = neigh
+                while p != current:
+                    dirbit = cells[p] & dirmask
+                    for k in range(n_dirs):
+                        if dir_vals[k] == dirbit:
+                            cells[p] &= ~dirmask
+                            p += flat_deltas[k]
+                            break
+                # forget the direction from last try
+                cells[current] &= ~dirmask
+                current = neigh
+                for k in range(ndim):
+                    coord[k] += deltas[d, k]
+            # else we need to keep walking
+            else:
+                # record what direction we went and continue
+                cells[current] = (cells[current] & ~dirmask) | dir_vals[d]
+                current = neigh
+                for k in range(ndim):
+                    coord[k] += deltas[d, k]
+
+    @njit(cache=True)
+    def _recurse_gen(cells, shape, deltas, flat_deltas, dir_vals,
+            opposites, start, start_coord, inmaze, hidden, rand):
+        # recurse_gen on an explicit stack over the flat cell buffer;
+        # like the walk kernel, events are not emitted here.  Each
+        # stack entry keeps its cell, its coordinate (for the bounds
+        # check) and its own shuffled direction order.
+        n_dirs = dir_vals.shape[0]
+        ndim = shape.shape[0]
+        size = cells.size
+        stack_cell = np.empty(size, dtype=np.int64)
+        stack_coord = np.empty((size, ndim), dtype=np.int64)
+        stack_dirs = np.empty((size, n_dirs), dtype=np.int64)
+        stack_next = np.empty(size, dtype=np.int64)
+
+        cells[start] |= inmaze
+        stack_cell[0] = start
+        for k in range(ndim):
+            stack_coord[0, k] = start_coord[k]
+        for k in range(n_dirs):
+            stack_dirs[0, k] = k
+        for k in range(n_dirs - 1, 0, -1):
+            j = rand.integers(0, k + 1)
+            t = stack_dirs[0, k]
+            stack_dirs[0, k] = stack_dirs[0, j]
+            stack_dirs[0, j] = t
+        stack_next[0] = 0
+        top = 1
+        while top > 0:
+            i = top - 1
+            current = stack_cell[i]
+            advanced = False
+            while stack_next[i] < n_dirs:
+                d = stack_dirs[i, stack_next[i]]
+                stack_next[i] += 1
+                inside = True
+                for k in range(ndim):
+                    c = stack_coord[i, k] + deltas[d, k]
+                    if c < 0 or c >= shape[k]:
+                        inside = False
+                        break
+                if not inside:
+                    # off the grid; go back and try another direction
+                    continue
+                neigh = current + flat_deltas[d]
+                if cells[neigh] & (hidden | inmaze):
+                    # go back and try another direction
+                    continue
+                # Empty.  Claim it, remember the direction we went
+                # and descend into the neighbor.
+                cells[current] |= dir_vals[d]
+                cells[neigh] |= inmaze | opposites[d]
+                stack_cell[top] = neigh
+                for k in range(ndim):
+                    stack_coord[top, k] = stack_coord[i, k] + deltas[d, k]
+                for k in range(n_dirs):
+                    stack_dirs[top, k] = k
+                for k in range(n_dirs - 1, 0, -1):
+                    j = rand.integers(0, k + 1)
+                    t = stack_dirs[top, k]
+                    stack_dirs[top, k] = stack_dirs[top, j]
+                    stack_dirs[top, j] = t
+                stack_next[top] = 0
+                top += 1
+                advanced = True
+                break
+            if not advanced:
+                # no unvisited neighbors left; back up
+                top -= 1
+
+    @njit(cache=True)
+    def _bfs_solve(cells, parent, queue, flat_steps, dirmask,
+            start, end):
+        # the event-free twin of the search loop in bfs_solve
+        parent[start] = -1
+        queue[0] = start
+        head = 0
+        tail = 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            if current == end:
+                break
+            doors = np.int64(cells[current]) & dirmask
+            while doors:
+                bit = doors & -doors
+                doors ^= bit
+                idx = 0
+                while bit > 1:
+                    bit >>= 1
+                    idx += 1
+                neigh = current + flat_steps[idx]
+                if parent[neigh] == -2:
+                    parent[neigh] = current
+                    queue[tail] = neigh
+                    tail += 1
+
+    # module-level copies of the constants the 2D kernel bakes in
+    # (numba freezes globals at compile time)
+    _N2, _E2, _S2, _W2 = Maze.N, Maze.E, Maze.S, Maze.W
+    _INMAZE2, _HIDDEN2, _DIRMASK2 = Maze.INMAZE, Maze.HIDDEN, Maze.DIR
+
+    @njit(cache=True)
+    def _wilson_walk_2d(cells, width, height, x, y, rand,
+            empty_flat, empty_pos, n_empty):
+        # _wilson_walk specialized for the common 2D orthogonal maze:
+        # four literal directions and flat index = x * height + y, so
+        # the compiler can unroll the dispatch and keep x,y in
+        # registers.
+        start = x * height + y
+        current = start
+        while True:
+            # pick a neighbor
+            d = rand.integers(0, 4)
+            if d == 0:
+                nx = x; ny = y - 1; dirbit = _N2; step = -1
+            elif d == 1:
+                nx = x + 1; ny = y; dirbit = _E2; step = height
+            elif d == 2:
+                nx = x; ny = y + 1; dirbit = _S2; step = 1
+            else:
+                nx = x - 1; ny = y; dirbit = _W2; step = -height
+            if nx < 0 or nx >= width or ny < 0 or ny >= height:
+                # go back and try another direction
+                continue
+            neigh = current + step
+            cell = cells[neigh]
+            if cell & _HIDDEN2:
+                continue
+            # did we find a maze cell?
+            if cell & _INMAZE2:
+                # record what direction we went
+                cells[current] = (cells[current] & ~_DIRMASK2) | dirbit
+                # mark the path from the walk start into the maze
+                p = start
+                opposite = 0
+                while p != neigh:
+                    db = cells[p] & _DIRMASK2
+                    cells[p] |= opposite | _INMAZE2
+                    # swap-remove p from the empty list
+                    pos = empty_pos[p]
+                    if pos >= 0:
+                        n_empty -= 1
+                        last = empty_flat[n_empty]
+                        empty_flat[pos] = last
+                        empty_pos[last] = pos
+                        empty_pos[p] = -1
+                    if db == _N2:
+                        opposite = _S2; p -= 1
+                    elif db == _E2:
+                        opposite = _W2; p += height
+                    elif db == _S2:
+                        opposite = _N2; p += 1
+                    else:
+                        opposite = _E2; p -= height
+                cells[neigh] |= opposite
+                # we are done
+                return n_empty
+            # or did we loop?
+            elif cell & _DIRMASK2:
+                # record what direction we went
+                cells[current] = (cells[current] & ~_DIRMASK2) | dirbit
+                # clean up the loop and continue from here
+                p = neigh
+                while p != current:
+                    db = cells[p] & _DIRMASK2
+                    cells[p] &= ~_DIRMASK2
+                    if db == _N2:
+                        p -= 1
+                    elif db == _E2:
+                        p += height
+                    elif db == _S2:
+                        p += 1
+                    else:
+                        p -= height
+                # forget the direction from last try
+                cells[current] &= ~_DIRMASK2
+                current = neigh
+                x = nx; y = ny
+            # else we need to keep walking
+            else:
+                # record what direction we went and continue
+                cells[current] = (cells[current] & ~_DIRMASK2) | dirbit
+                current = neigh
+                x = nx; y = ny
+
+
+if _bitwise_count is None:
+    # DIR sits just above the STATE bits; index the table by the DIR
+    # bits shifted down to zero.
+    _DIR_SHIFT = (Maze.DIR & -Maze.DIR).bit_length() - 1
+    _POPCOUNT = np.array(
+        [bin(i).count("1") for i in range((Maze.DIR >> _DIR_SHIFT) + 1)],
+        dtype=np.uint8)
+    def _bitwise_count(dir_bits):
+        return _POPCOUNT[dir_bits >> _DIR_SHIFT]
+
+
 def show(cells):
     # we can only display 2D and the x-axis only works with small values
     #
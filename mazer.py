@@ -4,17 +4,65 @@ import tkinter as tk
 from tkinter import ttk
 import sys
 import time
+import multiprocessing
 import threading
-import queue
 import numpy as np
 import secrets
-from enum import Enum, auto
+from functools import lru_cache
+from enum import IntEnum, auto
 
 from maze import Maze
 
-_sentinel = object()    # used to mark end of data in queue
+# Pillow is optional.  When it is available, a full-maze redraw is
+# rendered into a numpy framebuffer and reaches the canvas as a single
+# image blit instead of one canvas item per cell, which matters a lot
+# on big mazes.  Without it we fall back to per-cell drawing.
+try:
+    from PIL import Image, ImageTk
+except ImportError:
+    Image = ImageTk = None
+
+# The worker process marks the end of its event stream by sending the
+# finished cells array back (see pipeline below), so any ndarray on
+# the queue means "done".
+
+# The shape/coordinate normalizers run once per cell draw and per
+# popup; the same few tuples come through over and over, so the work
+# is memoized at module level where the tuples make natural keys.
+@lru_cache(maxsize=4096)
+def _shape2d(shape):
+    s = shape + (1, 1, 1)       # silently handle short shapes
+    if s[2] == 1:
+        return s[0:2]
+    else:
+        return s[0:3]
+
+@lru_cache(maxsize=4096)
+def _coord2d(coord, shape):
+    s = shape + (1, 1, 1)       # silently handle short shapes
+    c = coord + (0, 0, 0)
+    if s[2] == 1:
+        return c[0:2]
+    else:
+        return c[0:3]
+
+@lru_cache(maxsize=4096)
+def _shape3d(shape):
+    return (shape + (1, 1, 1))[0:3]
 
-class State(Enum):
+@lru_cache(maxsize=4096)
+def _coord3d(coord):
+    return (coord + (0, 0, 0))[0:3]
+
+@lru_cache(maxsize=4096)
+def _coord_trans(coord, shape):
+    # only the Y coordinate flips
+    if len(coord) >= 2 and len(shape) >= 2:
+        return (coord[0], shape[1] - coord[1] - 1) + coord[2:]
+    return coord
+
+# IntEnum so the per-event state tests compare as plain integers
+class State(IntEnum):
     INITIAL = auto()
     CLEARED = auto()
     GENERATING = auto()
@@ -48,31 +96,55 @@ COLOR_CLEAR = 'gray40'
 COLOR_DEAD = 'gray50'
 COLOR_SOLUTION = 'cyan'
 
-# Useful during debugging
+# draw_cell dispatch tables.  Each entry selects indexes into a
+# per-cell anchor tuple (plus fixed spans or offsets), so painting a
+# door or arrow is one dict lookup instead of a four-way match per
+# direction per cell.
+DOOR_BANDS = {          # (row index, row span, col index, col span)
+    Maze.N: (0, WALL_THICK, 4, CELL_SIZE),
+    Maze.E: (1, CELL_SIZE, 5, WALL_THICK),
+    Maze.S: (2, WALL_THICK, 4, CELL_SIZE),
+    Maze.W: (1, CELL_SIZE, 3, WALL_THICK),
+}
+DOOR_XY = {             # line endpoint indexes into the anchor tuple
+    Maze.N: (0, 4, 2, 4),
+    Maze.E: (5, 1, 5, 3),
+    Maze.S: (0, 6, 2, 6),
+    Maze.W: (7, 1, 7, 3),
+}
+ARROW_XY = {            # (dx0, dy0, dx1, dy1) from the cell center
+    Maze.N: (0, 0, 0, -ARROW_LEN),
+    Maze.E: (0, 0, ARROW_LEN, 0),
+    Maze.S: (0, 0, 0, ARROW_LEN),
+    Maze.W: (0, 0, -ARROW_LEN, 0),
+}
+
+# Door-bit decomposition precomputed for every direction pattern, so
+# the draw path indexes a table instead of calling Maze.bits per
+# paint.  The direction bits sit above the state bits; shift them down
+# to keep the table at one entry per pattern.
+_DIR_SHIFT = (Maze.DIR & -Maze.DIR).bit_length() - 1
+_DOOR_BITS = tuple(
+    tuple(1 << i for i in range(Maze.DIR.bit_length())
+        if (m << _DIR_SHIFT) & (1 << i))
+    for m in range((Maze.DIR >> _DIR_SHIFT) + 1))
+
+# Useful during debugging.  A table beats a match statement when this
+# gets called per cell on a large maze.
+_DIR_NAME = {
+    Maze.E: "E",
+    Maze.NE: "NE",
+    Maze.N: "N",
+    Maze.NW: "NW",
+    Maze.W: "W",
+    Maze.SW: "SW",
+    Maze.S: "S",
+    Maze.SE: "SE",
+    Maze.U: "U",
+    Maze.D: "D",
+}
 def dir_name(dir):
-    match dir & Maze.DIR:
-        case Maze.E:
-            return "E"
-        case Maze.NE:
-            return "NE"
-        case Maze.N:
-            return "N"
-        case Maze.NW:
-            return "NW"
-        case Maze.W:
-            return "W"
-        case Maze.SW:
-            return "SW"
-        case Maze.S:
-            return "S"
-        case Maze.SE:
-            return "SE"
-        case Maze.U:
-            return "U"
-        case Maze.D:
-            return "D"
-        case _:
-            return "?"
+    return _DIR_NAME.get(dir & Maze.DIR, "?")
 def dir_names(dirs):
     def bits(n):
         result = []
@@ -81,10 +153,7 @@ def dir_names(dirs):
             result.append(i ^ n)
             n = i
         return result
-    result = list()
-    for dir in bits(dirs & Maze.DIR):
-        result.append(dir_name(dir))
-    return result
+    return [_DIR_NAME.get(dir, "?") for dir in bits(dirs & Maze.DIR)]
 
 class App(tk.Tk):
     def __init__(self, title, size):
@@ -92,6 +161,7 @@ class App(tk.Tk):
         super().__init__()
         self.state = State.INITIAL
         self.start = self.end = self.tstart = self.tend = tuple()
+        self.remark()
         self.app_title = title
         self.log = None
         self.title(title)
@@ -110,6 +180,11 @@ class App(tk.Tk):
         self.step_button = None
         self.solve_button = None
         self.bg_color = self.cget('bg')
+        self._dims = None
+        self._flush_pending = False
+        self._last_drawn = dict()
+        self._dirty = dict()
+        self._dirty_pending = False
         self.settings = dict()
         event_callbacks = {
             "<<FileQuit>>": lambda _: self.quit(),
@@ -152,56 +227,48 @@ class App(tk.Tk):
     # if it is a 2D maze.  This accepts a tuple or list and returns a
     # new tuple that is perhaps only two members.
     def shape2d(self, shape):
-        s = list(shape)
-        s.extend([1, 1, 1])         # silently handle short shapes
-        if s[2] == 1:
-            return tuple(s[0:2])
-        else:
-            return tuple(s[0:3])
+        return _shape2d(tuple(shape))
 
     # This does a 2d conversion for a coordinate tuple.
     # However, it bases its decisions upon the given shape.
     # If the shape is omitted, it will use self.shape.
     def coord2d(self, coord, shape = None):
-        if shape is None:
-            shape = self.shape
-        s = list(shape)
-        s.extend([1, 1, 1])         # silently handle short shapes
-        c = list(coord)
-        c.extend([0, 0, 0])
-        if s[2] == 1:
-            return tuple(c[0:2])
-        else:
-            return tuple(c[0:3])
+        return _coord2d(tuple(coord),
+            tuple(self.shape if shape is None else shape))
 
     # These do the inverse
     def shape3d(self, shape):
-        s = list(shape)
-        s.extend([1, 1, 1])         # silently handle short shapes
-        return tuple(s[0:3])
-    def coord3d(Self, coord):
-        c = list(coord)
-        c.extend([0, 0, 0])         # silently handle short shapes
-        return tuple(c[0:3])
+        return _shape3d(tuple(shape))
+    def coord3d(self, coord):
+        return _coord3d(tuple(coord))
 
     # This transforms the maze coordinate directions to screen coordinate
     # directions. This is needed because the screen coordinate for (0,0)
     # at the top left, but a geometric coordinate system puts (0,0) at
     # the bottom left.
     def coord_trans(self, coord, shape = None):
-        if shape is None:
-            shape = self.shape
-        result = list()
-        n = len(shape)
-        for i in range(len(coord)):
-            if i == 1 and i < n:        # Y coordinate
-                result.append(shape[i] - coord[i] - 1)
-            else:
-                result.append(coord[i])
-        return tuple(result)
+        return _coord_trans(tuple(coord),
+            tuple(self.shape if shape is None else shape))
+
+    # Keep hash sets alongside start/end/tstart/tend: the "is this
+    # cell the start" tests run once per drawn cell, and a frozenset
+    # lookup beats building and scanning a tuple each time.
+    def remark(self):
+        self._start_set = frozenset((self.start, self.tstart)) - {tuple()}
+        self._end_set = frozenset((self.end, self.tend)) - {tuple()}
+        # draw_cell folds both membership tests into one dict lookup;
+        # start is inserted last so it wins a collision, matching the
+        # old check order
+        special = dict()
+        for coord in self._end_set:
+            special[coord] = COLOR_END
+        for coord in self._start_set:
+            special[coord] = COLOR_START
+        self._special = special
 
     def clear_start(self,coord):
         self.start = self.tstart = tuple()
+        self.remark()
         self.draw_cell(coord)
 
     def set_start(self,coord):
@@ -211,11 +278,13 @@ class App(tk.Tk):
         if len(self.tstart) and self.tstart != coord:
             redraw.append(self.tstart)
         self.start = self.tstart = coord
+        self.remark()
         for coord in redraw:
             self.draw_cell(coord)
 
     def clear_end(self,coord):
         self.end = self.tend = tuple()
+        self.remark()
         self.draw_cell(coord)
 
     def set_end(self,coord):
@@ -225,26 +294,65 @@ class App(tk.Tk):
         if len(self.tend) and self.tend != coord:
             redraw.append(self.tend)
         self.end = self.tend = coord
+        self.remark()
         for coord in redraw:
             self.draw_cell(coord)
 
     def clear_hidden(self,coord):
-        self.maze.cells[coord] &= ~Maze.HIDDEN
+        self.maze.cells[coord] &= Maze.ALLBITS ^ Maze.HIDDEN
         self.draw_cell(coord)
 
     def set_hidden(self,coord):
         self.maze.cells[coord] |= Maze.HIDDEN
         self.draw_cell(coord)
 
+    # Bulk versions for flagging many cells at once: one vectorized
+    # write into the cells array and one redraw, instead of a Python
+    # round trip per cell.  coords is anything np.asarray can turn
+    # into an (n, ndim) array.
+    def set_hidden_bulk(self,coords):
+        coords = np.asarray(coords)
+        np.bitwise_or.at(self.maze.cells, tuple(coords.T), Maze.HIDDEN)
+        self.draw_maze()
+
+    def clear_hidden_bulk(self,coords):
+        coords = np.asarray(coords)
+        self.maze.cells[tuple(coords.T)] &= Maze.ALLBITS ^ Maze.HIDDEN
+        self.draw_maze()
+
     # A couple canvas/cell untility functions
+    def dims(self):
+        # cached (width, height, levels, canvas_w, canvas_h); these
+        # are asked for on every popup and mouse mapping, and only
+        # change when recanvas invalidates the cache
+        if self._dims is None:
+            (width, height, levels) = self.shape3d(self.maze.cells.shape)
+            self._dims = (width, height, levels,
+                LEFT_MARGIN + width * SPACING + WALL_THICK + RIGHT_MARGIN,
+                TOP_MARGIN + height * SPACING + WALL_THICK + BOT_MARGIN
+            )
+            # pixel anchor tables so draw_cell looks its geometry up
+            # instead of rebuilding the same arithmetic per call
+            self._xanchors = []
+            for x in range(width):
+                leftwall = LEFT_MARGIN + x * SPACING
+                leftcell = leftwall + WALL_THICK
+                rightwall = leftwall + SPACING
+                self._xanchors.append((leftwall, leftcell,
+                    rightwall, rightwall - 1, leftcell + HALF_CELL))
+            self._yanchors = []
+            for y in range(height):
+                topwall = TOP_MARGIN + y * SPACING
+                topcell = topwall + WALL_THICK
+                bottomwall = topwall + SPACING
+                self._yanchors.append((topwall, topcell,
+                    bottomwall, bottomwall - 1, topcell + HALF_CELL))
+        return self._dims
     def canvas_size(self):
-        (width, height, levels) = list(self.shape3d(self.maze.cells.shape))
-        return (
-            LEFT_MARGIN + width * SPACING + WALL_THICK + RIGHT_MARGIN,
-            TOP_MARGIN + height * SPACING + WALL_THICK + BOT_MARGIN
-        )
+        (width, height, levels, w, h) = self.dims()
+        return (w, h)
     def canvasxy2cell(self,canvas,x,y):
-        (width, height, levels) = list(self.shape3d(self.maze.cells.shape))
+        (width, height, levels, w, h) = self.dims()
         cellx = min((x - LEFT_MARGIN) // SPACING, width - 1)
         celly = min((y - TOP_MARGIN) // SPACING, height - 1)
         return (cellx, celly)
@@ -262,8 +370,8 @@ class App(tk.Tk):
             coord = self.coord2d((cellx, celly, canvas.level))
             cell = self.maze.cells[coord]
             ishidden = cell & Maze.HIDDEN
-            isstart = coord in (self.start, self.tstart)
-            isend = coord in (self.end, self.tend)
+            isstart = coord in self._start_set
+            isend = coord in self._end_set
             hiddenstate = startstate = endstate = tk.NORMAL
             if isend or ishidden: startstate = tk.DISABLED
             if isstart:
@@ -338,26 +446,25 @@ class App(tk.Tk):
 
     def add_widgets(self):
 
-        # Local storage and functions to validate and fix dimensions
+        # Local storage and functions to validate and fix dimensions.
+        # Validation runs on focus out only, so typing in the entry
+        # never crosses the Tcl/Python bridge per keystroke.
         values = dict()     # where we remember the last valid value
-        def dim_validate(reason, action, val, name, maximum):
+        def dim_save(name):
+            # Save the value on focus in
+            values[name] = self.entry_vars[name].get()
+        def dim_validate(val, name, maximum):
+            # Validate it and optionally fix it on focus out
             maximum = int(maximum)
-            ok = True
-            match reason:
-                case "focusin":
-                    # Save the value on focus in
-                    values[name] = val
-                case "focusout":
-                    # Validate it and optionally fix it on focus out
-                    try:
-                        n = int(val)
-                    except ValueError:
-                        ok = False
-                    else:
-                        ok = 0 < n and n <= MAX_DIMENSION and n <= maximum
-                    if not ok:
-                        self.entry_vars[name].set(values[name])
-                    self.update_states()
+            try:
+                n = int(val)
+            except ValueError:
+                ok = False
+            else:
+                ok = 0 < n and n <= MAX_DIMENSION and n <= maximum
+            if not ok:
+                self.entry_vars[name].set(values[name])
+            self.update_states()
             return ok
 
         # Wrap up label, entry and validation as one function
@@ -368,12 +475,14 @@ class App(tk.Tk):
                 text=name,
                 font=("TkDefaultFont", 10)
                 ).grid(row=row,column=0, padx=5)
-            ttk.Entry(parent,
+            entry = ttk.Entry(parent,
                 textvariable=self.entry_vars[name],
                 width=6,
-                validate="all",
-                validatecommand=(dim_register, "%V", "%d", "%P", name, maximum),
-            ).grid(row=row,column=1, padx=5)
+                validate="focusout",
+                validatecommand=(dim_register, "%P", name, maximum),
+            )
+            entry.grid(row=row,column=1, padx=5)
+            entry.bind("<FocusIn>", lambda _, name=name: dim_save(name))
 
         # First section is just a title
         ttk.Label(self,
@@ -420,7 +529,7 @@ class App(tk.Tk):
                 text=generator,
                 variable=self.generator_var,
                 value=generator,
-                command=lambda : self.update_states()
+                command=self.update_states
             ).grid(row=i + 1, column=0, sticky="ew")
             i += 1
 
@@ -446,7 +555,7 @@ class App(tk.Tk):
                 text=solver,
                 variable=self.solver_var,
                 value=solver,
-                command=lambda : self.update_states()
+                command=self.update_states
             ).grid(row=i + 1, column=0, sticky="ew")
             i += 1
 
@@ -507,6 +616,8 @@ class App(tk.Tk):
         # Prior to generation, we create one tab to save the space.
         self.note_book = ttk.Notebook(self, padding=5)
         self.note_book.grid(row=3, sticky=tk.N + tk.E + tk.S + tk.W)
+        # a tab raised after being hidden may hold a stale framebuffer
+        self.note_book.bind("<<NotebookTabChanged>>", lambda _: self.flush_levels())
         self.note_book.master.rowconfigure(3,weight=1)
         self.note_book.master.columnconfigure(0,weight=1)
         self.tabs = dict()
@@ -604,8 +715,10 @@ class App(tk.Tk):
             self.maze.clean()
             self.grid_maze(cells=COLOR_CLEAR, walls=COLOR_WALL)
 
-        # Start/restart RNG with seed
-        self.maze.rand = np.random.default_rng(self.seed)
+        # Start/restart RNG with seed.  SFC64 is noticeably faster
+        # than the default PCG64 for the small integer draws the
+        # generators live on, and replays just as deterministically.
+        self.maze.rand = np.random.Generator(np.random.SFC64(self.seed))
         self.state = State.GENERATING
         self.update_states()
         self.generate()
@@ -641,31 +754,93 @@ class App(tk.Tk):
         if len(self.end):
             params["end"] = self.end
         self.tstart = self.tend = tuple()
+        self.remark()
         if self.single_threaded:
             solver(self.maze, **params)
         else:
             self.pipeline(solver, [self.maze], params, handler)
 
     def pipeline(self, producer, args, kwargs, consumer):
+        reader = None       # receive side of the queue's pipe
+        armed = False       # is the file handler installed?
+        poll_id = None      # pending fallback timer, if any
+
+        # Instead of polling the queue on a timer, let Tcl watch the
+        # pipe and call us when data is actually there.  File handlers
+        # are level triggered, so returning with data still buffered
+        # just means we get called right back.
+        def arm():
+            nonlocal armed
+            if armed or self.queue is None:
+                return
+            try:
+                self.tk.createfilehandler(reader, tk.READABLE, _ready)
+                armed = True
+            except Exception:
+                # no Tcl file handlers on this platform; poll instead
+                schedule_poll()
+
+        def disarm():
+            nonlocal armed
+            if armed:
+                self.tk.deletefilehandler(reader)
+                armed = False
+
+        def _ready(file, mask):
+            _consumer()
+
+        def schedule_poll():
+            nonlocal poll_id
+            if poll_id is None:
+                poll_id = self.after(16, _poll)
+
+        def _poll():
+            nonlocal poll_id
+            poll_id = None
+            _consumer()
+
         def _consumer():
             if self.queue is None: return
-            try:
-                data = self.queue.get(False)
-            except queue.Empty:
-                # If nothing waiting, check back again later
-                self.after(100, _consumer)
+            stepping = self.step_var.get() != 0
+            # single stepping turns the wakeups off; the step button
+            # drives us instead
+            if stepping:
+                disarm()
             else:
-                if data is _sentinel:
+                arm()
+            # Drain the queue for up to about one display frame before
+            # yielding back to Tk, instead of one event per wakeup.
+            # This keeps the drawing from being the bottleneck while
+            # still letting Tk breathe.
+            deadline = time.monotonic() + 0.016
+            while True:
+                if self.queue.empty():
+                    if not armed:
+                        # If nothing waiting, check back again later
+                        schedule_poll()
+                    return
+                data = self.queue.get()
+                if isinstance(data, np.ndarray):
+                    # the finished cells, as they ended up in the
+                    # worker process; the parent never saw the writes
+                    self.maze.cells = data
+                    disarm()
                     self.queue = None
-                else:
-                    # We use a lambda function to change the opaque
-                    # data into **kwargs.   I am not sure if this is
-                    # needed, but it seems to be.
-                    visible = (lambda kwargs: consumer(**kwargs))(data)
-                    # If there was no visible update, or not single stepping
-                    # check again in a litle bit
-                    if self.step_var.get() == 0 or not visible:
-                        self.after(10, _consumer)
+                    self.worker.join()
+                    return
+                # We use a lambda function to change the opaque
+                # data into **kwargs.   I am not sure if this is
+                # needed, but it seems to be.
+                visible = (lambda kwargs: consumer(**kwargs))(data)
+                # Single stepping pauses after each visible update;
+                # the step button reschedules us.
+                if stepping and visible:
+                    return
+                if time.monotonic() >= deadline:
+                    if not armed:
+                        schedule_poll()
+                    return
+
         def _producer(*args, **kwargs):
 #            callback=lambda **kw: self.queue.put(kw)
 #            producer(self.maze,
@@ -673,31 +848,243 @@ class App(tk.Tk):
 #                callback=callback
 #            )
             producer(*args,**kwargs)
-            self.queue.put(_sentinel)
-
+            # A forked worker exits through os._exit, which never
+            # flushes the block-buffered logfile it inherited; push
+            # out whatever the events wrote before we finish.
+            log = kwargs.get("log")
+            if log is not None:
+                log.flush()
+            # ship the finished cells back to the parent and mark the
+            # end of the event stream
+            self.queue.put(self.maze.cells)
+
+        # The producer runs in its own process rather than a thread:
+        # a pure-Python generator in a thread just trades the GIL back
+        # and forth with the Tk mainloop.  On fork the child inherits
+        # the maze (and its seeded RNG), works on its own copy, and
+        # streams events back through the queue.
         kw = kwargs.copy()
         kw["callback"] = lambda **kw: self.queue.put(kw)
         self.stepper = _consumer
-        self.queue = queue.Queue(0)
-        self.thread = threading.Thread(target=_producer, args=args, kwargs=kw)
-        self.thread.start()
-        self.after(100, _consumer)
+        # _producer and the callback are closures, which the spawn
+        # start method (the default on Windows and macOS) cannot
+        # pickle; where fork is unavailable fall back to a daemon
+        # thread, trading GIL contention for working at all.
+        if "fork" in multiprocessing.get_all_start_methods():
+            ctx = multiprocessing.get_context("fork")
+            # SimpleQueue writes straight to the pipe -- no feeder
+            # thread and less locking than the full Queue
+            self.queue = ctx.SimpleQueue()
+            self.worker = ctx.Process(
+                target=_producer, args=args, kwargs=kw, daemon=True)
+        else:
+            self.queue = multiprocessing.SimpleQueue()
+            self.worker = threading.Thread(
+                target=_producer, args=args, kwargs=kw, daemon=True)
+        reader = self.queue._reader
+        self.worker.start()
+        _consumer()
 
     def clear_solution(self):
         self.tstart = self.tend = tuple()
+        self.remark()
         self.maze.unsolve()
         self.grid_maze()
         self.draw_maze()
 
     def draw_maze(self, /, *, color=None):
-        # Generate all the coordinates and draw each cell
-        for coord in zip(*np.nonzero(self.maze.cells | 1)):
-            self.draw_cell(coord, color=color)
+        self._last_drawn = dict()
+        if Image is not None:
+            # Render each level once and hand it to the canvas as one
+            # image -- a single Tcl call instead of one per cell.
+            (width, height, levels) = self.shape3d(self.maze.cells.shape)
+            for level in range(levels):
+                self.blit_level(level, self.render_level(level, color=color))
+            return
+        # Generate all the coordinates and draw each cell.
+        # ndindex walks every coordinate without materializing the
+        # "cells | 1" array that nonzero() needed as bait.
+        draw_cell = self.draw_cell
+        for coord in np.ndindex(self.maze.cells.shape):
+            draw_cell(coord, color=color)
+
+    def color_rgb(self, name):
+        # resolve a Tk color name to an RGB triple, memoized
+        try:
+            return self._rgb_cache[name]
+        except AttributeError:
+            self._rgb_cache = dict()
+        except KeyError:
+            pass
+        (r, g, b) = self.winfo_rgb(name)
+        rgb = (r // 257, g // 257, b // 257)
+        self._rgb_cache[name] = rgb
+        return rgb
+
+    def render_level(self, level, /, *, color=None):
+        # Paint one whole level into an RGB framebuffer.  All the
+        # per-cell decisions are made with whole-array masks, and the
+        # pixels land with numpy slice assignments.
+        (width, height, levels) = self.shape3d(self.maze.cells.shape)
+        cells = self.maze.cells
+        if len(cells.shape) == 3:
+            cells = cells[:, :, level]
+        (w, h) = self.canvas_size()
+        fb = np.empty((h, w, 3), dtype=np.uint8)
+        fb[:] = self.color_rgb(self.bg_color)
+
+        xleft = LEFT_MARGIN
+        ytop = TOP_MARGIN
+        wall = self.color_rgb(COLOR_WALL)
+        # walls as solid bands; the doors are punched out below.
+        # strided slices hit every band at once, so the python loop
+        # runs WALL_THICK times instead of once per grid line
+        xmax = xleft + width * SPACING + WALL_THICK
+        ymax = ytop + height * SPACING + WALL_THICK
+        for t in range(WALL_THICK):
+            fb[ytop:ymax, xleft + t:xmax:SPACING] = wall
+            fb[ytop + t:ymax:SPACING, xleft:xmax] = wall
+
+        # one color per cell
+        colors = np.empty((width, height, 3), dtype=np.uint8)
+        if color is not None:
+            colors[:] = self.color_rgb(color)
+        else:
+            colors[:] = self.color_rgb(self.bg_color)
+            empty = (cells & Maze.INUSE) == 0
+            colors[empty] = self.color_rgb(COLOR_CLEAR)
+            # empty but with directions means mid random walk
+            colors[empty & ((cells & Maze.DIR) != 0)] = \
+                self.color_rgb(COLOR_WALK)
+            colors[(cells & Maze.HIDDEN) != 0] = self.color_rgb(COLOR_BLOCK)
+            for (coords, name) in (
+                (self._start_set, COLOR_START),
+                (self._end_set, COLOR_END),
+            ):
+                for coord in coords:
+                    c = self.coord3d(coord)
+                    if c[2] == level:
+                        colors[c[0], c[1]] = self.color_rgb(name)
+
+        # fill every cell interior in one indexed assignment
+        xs = (xleft + WALL_THICK + np.arange(width)[:, None] * SPACING
+            + np.arange(CELL_SIZE)).reshape(-1)
+        ys = (ytop + WALL_THICK + np.arange(height)[:, None] * SPACING
+            + np.arange(CELL_SIZE)).reshape(-1)
+        fb[np.ix_(ys, xs)] = np.repeat(
+            np.repeat(colors.transpose(1, 0, 2), CELL_SIZE, axis=0),
+            CELL_SIZE, axis=1)
+
+        # punch the doors through the walls in the cell's color
+        for (direction, vertical, off) in (
+            (Maze.N, False, 0),
+            (Maze.S, False, 1),
+            (Maze.W, True, 0),
+            (Maze.E, True, 1),
+        ):
+            doors = np.argwhere((cells & direction) != 0)
+            if not len(doors):
+                continue
+            cx = doors[:, 0]
+            cy = doors[:, 1]
+            if vertical:
+                cols = (xleft + (cx + off)[:, None] * SPACING
+                    + np.arange(WALL_THICK))
+                rows = (ytop + WALL_THICK + cy[:, None] * SPACING
+                    + np.arange(CELL_SIZE))
+            else:
+                cols = (xleft + WALL_THICK + cx[:, None] * SPACING
+                    + np.arange(CELL_SIZE))
+                rows = (ytop + (cy + off)[:, None] * SPACING
+                    + np.arange(WALL_THICK))
+            fb[rows[:, :, None], cols[:, None, :]] = \
+                colors[cx, cy][:, None, None, :]
+        return fb
+
+    def blit_level(self, level, fb):
+        try:
+            canvas = self.tabs[level]
+        except Exception:
+            return
+        # The framebuffer stays attached to the canvas: draw_cell
+        # paints into it and flush_levels pastes it to the screen.
+        canvas.fb = fb
+        canvas.fb_dirty = False
+        photo = getattr(canvas, 'photo', None)
+        if photo is not None and (photo.width(), photo.height()) == (fb.shape[1], fb.shape[0]):
+            # same geometry: repaint the existing image item in place
+            photo.paste(Image.fromarray(fb))
+            return
+        canvas.delete("all")
+        canvas.items = dict()
+        # keep a reference or Tk will garbage collect the image
+        canvas.photo = ImageTk.PhotoImage(Image.fromarray(fb))
+        canvas.create_image(0, 0, anchor=tk.NW, image=canvas.photo)
+
+    def cell_sprite(self, arrow_key, fill):
+        # Cell interiors repeat endlessly: the same few fill colors
+        # and the same few arrow patterns.  Render each combination
+        # once and reuse the block; the cache stays tiny.
+        try:
+            return self._sprites[(arrow_key, fill)]
+        except AttributeError:
+            self._sprites = dict()
+        except KeyError:
+            pass
+        sprite = np.empty((CELL_SIZE, CELL_SIZE, 3), dtype=np.uint8)
+        sprite[:] = self.color_rgb(fill)
+        arrow = self.color_rgb(COLOR_ARROW)
+        c = HALF_CELL
+        if arrow_key & Maze.N:
+            sprite[c - ARROW_LEN:c, c] = arrow
+        if arrow_key & Maze.E:
+            sprite[c, c:c + ARROW_LEN] = arrow
+        if arrow_key & Maze.S:
+            sprite[c:c + ARROW_LEN, c] = arrow
+        if arrow_key & Maze.W:
+            sprite[c, c - ARROW_LEN:c] = arrow
+        self._sprites[(arrow_key, fill)] = sprite
+        return sprite
+
+    def flush_levels(self):
+        # Paste any dirty framebuffers to the screen.  draw_cell only
+        # marks the buffer dirty and schedules us on the idle queue,
+        # so a burst of events costs a single paste per frame.  Only
+        # the tab being displayed is worth pasting; hidden levels keep
+        # their dirty flag and catch up when raised.
+        self._flush_pending = False
+        try:
+            shown = self.note_book.index('current')
+        except Exception:
+            shown = None
+        for (level, canvas) in self.tabs.items():
+            if shown is not None and level != shown:
+                continue
+            if getattr(canvas, 'fb_dirty', False):
+                photo = getattr(canvas, 'photo', None)
+                if photo is None:
+                    continue
+                photo.paste(Image.fromarray(canvas.fb))
+                canvas.fb_dirty = False
 
     def recanvas(self):
+        self._dims = None
+        self._last_drawn = dict()
+        self._dirty = dict()
         (width, height, levels) = list(self.shape3d(self.maze.cells.shape))
         w = width * SPACING + WALL_THICK + 1
         h = height * SPACING + WALL_THICK + 1
+        # The usual change is width/height only.  With the level count
+        # unchanged there is nothing to destroy or create -- resizing
+        # and clearing the existing canvases avoids a widget-rebuild
+        # stall.
+        if levels == len(self.tabs):
+            for canvas in self.tabs.values():
+                canvas.configure(width=w, height=h)
+                canvas.delete("all")
+                canvas.items = dict()
+                canvas.photo = None
+            return
         keys = list(self.tabs.keys())   # must be a copy
         # Get rid of excess levels
         for key in keys:
@@ -716,6 +1103,8 @@ class App(tk.Tk):
         for level in range(levels):
             if level in keys:
                 self.tabs[level].delete("all")
+                self.tabs[level].items = dict()
+                self.tabs[level].photo = None
             else:
                 self.tabs[level] = self.add_book(self.note_book,level)
         pass
@@ -731,7 +1120,9 @@ class App(tk.Tk):
             case "clear-cell":
                 self.draw_cell(kwargs["current"], cell=0, color=COLOR_CLEAR)
             case "mark-cell":
-                self.draw_cell(kwargs["current"])
+                # use the payload: in pipelined mode the generator's
+                # writes never reach our copy of the cells
+                self.draw_cell(kwargs["current"], cell=kwargs["cell"])
             case "walk-start":
                 self.draw_cell(kwargs["current"], cell=Maze.INMAZE)
             case "walk-end":
@@ -759,17 +1150,21 @@ class App(tk.Tk):
                 self.update_states()
             case "random-start":
                 self.tstart=kwargs["start"]
+                self.remark()
                 self.draw_cell(kwargs["start"])
             case "random-end":
                 self.tend=kwargs["end"]
+                self.remark()
                 self.draw_cell(kwargs["end"])
             case "dead-end":
                 self.draw_cell(kwargs["current"], color=COLOR_DEAD)
+            case "visit-cell":
+                self.draw_cell(kwargs["current"], color=COLOR_DEAD)
             case "solution":
                 coord = kwargs["current"]
-                if coord in (self.start, self.tstart):
+                if coord in self._start_set:
                     color = COLOR_START
-                elif coord in (self.end, self.tend):
+                elif coord in self._end_set:
                     color = COLOR_END
                 else:
                     color = COLOR_SOLUTION
@@ -780,6 +1175,14 @@ class App(tk.Tk):
 
     def grid_maze(self, /, *, cells = None, walls = None):
         shape = self.shape3d(self.maze.cells.shape)
+        # The background fill paints every interior in one go; prime
+        # the dedup cache so the per-cell repaints in that same color
+        # that usually follow get skipped in draw_cell.
+        if cells is None:
+            self._last_drawn = dict()
+        else:
+            self._last_drawn = {coord: (0, cells)
+                for coord in np.ndindex(self.maze.cells.shape)}
         for level in range(shape[2]):
             self.grid_level(level, cells = cells, walls = walls)
 
@@ -789,6 +1192,12 @@ class App(tk.Tk):
         except Exception:
             return
 
+        if Image is not None:
+            # double-buffered path: render the level into a fresh
+            # framebuffer and put it up in one blit
+            self.blit_level(level, self.render_level(level, color=cells))
+            return
+
         if walls is None: walls=COLOR_WALL
         shape = self.shape2d(self.maze.cells.shape)
         (width, height) = shape[0:2]
@@ -813,36 +1222,73 @@ class App(tk.Tk):
                 width=0
             )
 
+        # Each create_line is a separate canvas item and a separate
+        # trip into Tcl, so instead of one line per wall we snake a
+        # single polyline through all of them: down one column, across
+        # to the next along the bottom, back up, and so on.  The short
+        # connector segments lie on top of the outermost horizontal
+        # (resp. vertical) walls, so nothing visible changes, and the
+        # whole grid is two canvas items instead of width+height+2.
+
         # Vertical lines
         x = xleft + fudge
+        ybot = ybottom + WALL_THICK
+        coords = []
         for i in range(width + 1):
-            canvas.create_line(
-                x, ytop, x, ybottom + WALL_THICK,
-                fill=walls,
-                width=WALL_THICK
-            )
-            #canvas.create_line(x,ybottom + 10,x,ybottom+20,fill='red',width=1)
+            if i % 2 == 0:
+                coords += (x, ytop, x, ybot)
+            else:
+                coords += (x, ybot, x, ytop)
             x += SPACING
+        canvas.create_line(*coords, fill=walls, width=WALL_THICK)
 
         # Horizontal lines
         y = ytop + fudge
+        xrgt = xright + WALL_THICK
+        coords = []
         for i in range(height + 1):
-            canvas.create_line(
-                xleft, y, xright + WALL_THICK, y,
-                fill=walls,
-                width=WALL_THICK
-            )
-            #canvas.create_line(xright + 10,y,xright+20,y,fill='red',width=1)
+            if i % 2 == 0:
+                coords += (xleft, y, xrgt, y)
+            else:
+                coords += (xrgt, y, xleft, y)
             y += SPACING
+        canvas.create_line(*coords, fill=walls, width=WALL_THICK)
 
     def draw_cell(self, coord, /, *, color=None, cell=None):
-        shape = self.maze.cells.shape
-        for i in range(len(shape)):
-            if (n := coord[i]) < 0 or shape[i] <= n:
-                return
-        if cell is None:
-            cell = self.maze.cells[coord]
+        # Coalesce: only the last (cell, color) requested for a
+        # coordinate matters, so updates land in a dirty map and the
+        # actual painting happens at most once per flush tick (about
+        # 30 Hz).  A cell repainted five times in a frame costs one
+        # paint.
+        self._dirty[coord] = (cell, color)
+        if not self._dirty_pending:
+            self._dirty_pending = True
+            self.after(33, self._flush_dirty)
+
+    def _flush_dirty(self):
+        self._dirty_pending = False
+        dirty = self._dirty
+        self._dirty = dict()
+        draw = self.draw_cell_now
+        for (coord, (cell, color)) in dirty.items():
+            draw(coord, color=color, cell=cell)
+        self.update_idletasks()
+
+    def draw_cell_now(self, coord, /, *, color=None, cell=None):
+        # bounds check without a per-axis loop: pad the coordinate to
+        # 3d and compare against the cached dimensions in one shot
         (x, y, z) = self.coord3d(coord)
+        (width, height, levels) = self.dims()[:3]
+        if (x | y | z) < 0 or x >= width or y >= height or z >= levels:
+            return
+        # hot path: this runs for every visible event, so bind the
+        # flag constants and per-call invariants to locals once rather
+        # than re-resolving the attribute chains per test below
+        maze = self.maze
+        (DIR, INUSE, HIDDEN) = (Maze.DIR, Maze.INUSE, Maze.HIDDEN)
+        if cell is None:
+            cell = maze.cells[coord]
+        cell = int(cell)
 
         # Get the canvas we will act upon
         try:
@@ -857,94 +1303,130 @@ class App(tk.Tk):
         # Hense the fudge factor.   It might be best to keep the line
         # widths an odd number.
         fudge = int(WALL_THICK // 2)
-        leftwall = LEFT_MARGIN + x * SPACING     # X of left wall
-        leftcell = leftwall + WALL_THICK         # X of left side of cell
-        rightwall = leftwall + SPACING          # X of right wall
-        rightcell = rightwall - 1               # X of right side of cell
-        topwall = TOP_MARGIN + y * SPACING       # Y of top wall
-        topcell = topwall + WALL_THICK           # Y of top side of Cell
-        bottomwall = topwall + SPACING          # Y of bottom wall
-        bottomcell = bottomwall - 1             # Y of bottom side of cell
-        xcenter = leftcell + HALF_CELL
-        ycenter = topcell + HALF_CELL
-
-        doors = self.maze.bits(cell & Maze.DIR)
-        arrows = list()
-
-        fill = self.bg_color
-        if (cell & Maze.INUSE) == 0:
-            if cell & Maze.DIR:
+        (leftwall, leftcell, rightwall, rightcell, xcenter) = \
+            self._xanchors[x]
+        (topwall, topcell, bottomwall, bottomcell, ycenter) = \
+            self._yanchors[y]
+
+        doors = _DOOR_BITS[(cell & DIR) >> _DIR_SHIFT]
+        arrows = ()
+
+        fill = bg = self.bg_color
+        if (cell & INUSE) == 0:
+            if cell & DIR:
                 # must be doing random walk
                 fill = COLOR_WALK
                 arrows = doors
-                doors = list()
+                doors = ()
             else:
                 fill = COLOR_CLEAR
-        elif cell & Maze.HIDDEN:
+        elif cell & HIDDEN:
             fill = COLOR_BLOCK
-            doors = list()
-        elif cell & Maze.INUSE:
-            fill = self.bg_color
+            doors = ()
+        elif cell & INUSE:
+            fill = bg
 
-        if coord in (self.start, self.tstart):
-            fill = COLOR_START
-        elif coord in (self.end, self.tend):
-            fill = COLOR_END
+        fill = self._special.get(coord, fill)
 
         if color is not None:
             fill = color
 
-        # Draw cell within the walls
-        canvas.create_rectangle(
-            leftcell - 1, topcell - 1, rightwall, bottomwall,
-            fill=fill,
-            width=0
-        )
+        # Nothing to do if the cell was last drawn exactly like this;
+        # clear floods and repeated walk events hit this constantly.
+        key = (cell, fill)
+        if self._last_drawn.get(coord) == key:
+            return
+        self._last_drawn[coord] = key
+
+        # Double-buffered path: paint the cell into the framebuffer
+        # and let flush_levels paste it at the end of the frame.
+        fb = getattr(canvas, 'fb', None)
+        if fb is not None:
+            rgb = self.color_rgb(fill)
+            # the interior (with any walk arrows baked in) comes from
+            # the sprite cache as a single block copy
+            arrow_key = (cell & DIR) if arrows else 0
+            fb[topcell:topcell + CELL_SIZE,
+                leftcell:leftcell + CELL_SIZE] = \
+                self.cell_sprite(arrow_key, fill)
+            # doors are painted through the walls in the cell color
+            if doors:
+                fbase = (topwall, topcell, bottomwall,
+                    leftwall, leftcell, rightwall)
+                for dir in doors:
+                    sel = DOOR_BANDS.get(dir)
+                    if sel is None:
+                        continue
+                    r = fbase[sel[0]]
+                    c = fbase[sel[2]]
+                    fb[r:r + sel[1], c:c + sel[3]] = rgb
+            canvas.fb_dirty = True
+            if not self._flush_pending:
+                self._flush_pending = True
+                self.after_idle(self.flush_levels)
+            return
 
-        #doors = list()
+        # Draw cell within the walls.  Each cell owns one persistent
+        # rectangle that is recolored in place; door and arrow lines
+        # are remade only when the cell actually changes.  (The old
+        # code stacked fresh items on the canvas at every update and
+        # never deleted any of them.)
+        try:
+            items = canvas.items
+        except AttributeError:
+            items = canvas.items = dict()
+        entry = items.get(coord)
+        if entry is None:
+            rect = canvas.create_rectangle(
+                leftcell - 1, topcell - 1, rightwall, bottomwall,
+                fill=fill,
+                width=0
+            )
+            lines = []
+            items[coord] = [rect, lines, cell]
+        else:
+            (rect, lines, prev) = entry
+            canvas.itemconfig(rect, fill=fill)
+            if prev == cell and not arrows:
+                # Fill-only fast path: the door set is unchanged (the
+                # usual case when the solver recolors a cell), so
+                # recolor the existing door lines in place instead of
+                # rebuilding them.
+                for item in lines:
+                    canvas.itemconfig(item, fill=fill)
+                return
+            entry[2] = cell
+            for item in lines:
+                canvas.delete(item)
+            del lines[:]
 
         # Erase the walls that are really doors
-        for dir in doors:
-            match dir:
-                case Maze.N:
-                    y = topwall + fudge
-                    xy = (leftcell - 1, y, rightcell + 1, y)
-                case Maze.E:
-                    x = rightwall + fudge
-                    xy = (x, topcell - 1, x, bottomcell + 1)
-                case Maze.S:
-                    y = bottomwall + fudge
-                    xy = (leftcell - 1, y, rightcell + 1, y)
-                case Maze.W:
-                    x = leftwall + fudge
-                    xy = (x, topcell - 1, x, bottomcell + 1)
-                case _:
+        if doors:
+            base = (leftcell - 1, topcell - 1, rightcell + 1,
+                bottomcell + 1, topwall + fudge, rightwall + fudge,
+                bottomwall + fudge, leftwall + fudge)
+            for dir in doors:
+                sel = DOOR_XY.get(dir)
+                if sel is None:
                     continue
-            (x0, y0, x1, y1) = xy
-            canvas.create_line(x0, y0, x1, y1,
-                fill=fill,
-                width=WALL_THICK + 1,
-            )
+                lines.append(canvas.create_line(
+                    base[sel[0]], base[sel[1]], base[sel[2]], base[sel[3]],
+                    fill=fill,
+                    width=WALL_THICK + 1,
+                ))
 
         # Draw arrows when walking
         for dir in arrows:
-            match dir:
-                case Maze.N:
-                    xy = (xcenter, ycenter, xcenter, ycenter - ARROW_LEN)
-                case Maze.E:
-                    xy = (xcenter, ycenter, xcenter + ARROW_LEN, ycenter)
-                case Maze.S:
-                    xy = (xcenter, ycenter, xcenter, ycenter + ARROW_LEN)
-                case Maze.W:
-                    xy = (xcenter, ycenter, xcenter - ARROW_LEN, ycenter)
-                case _:
-                    continue
-            (x0, y0, x1, y1) = xy
-            canvas.create_line(x0, y0, x1, y1,
+            off = ARROW_XY.get(dir)
+            if off is None:
+                continue
+            lines.append(canvas.create_line(
+                xcenter + off[0], ycenter + off[1],
+                xcenter + off[2], ycenter + off[3],
                 fill=COLOR_ARROW,
                 width=ARROW_THICK,
                 arrow=tk.LAST,
-            )
+            ))
 
 class GenericMainMenu(tk.Menu):
     """The main menu"""
@@ -953,9 +1435,10 @@ class GenericMainMenu(tk.Menu):
     accelerators = {
         "quit": "Ctrl+Q"
     }
-    keybinds = {
-        "<Control-q>": "<<FileQuit>>"
-    }
+    # immutable on purpose: instances must not edit the class table
+    keybinds = (
+        ("<Control-q>", "<<FileQuit>>"),
+    )
 
     def __init__(self, parent, settings, **kwargs):
         super().__init__(parent, **kwargs)
@@ -964,16 +1447,27 @@ class GenericMainMenu(tk.Menu):
         self._build_menu()
         self._bind_accelerators()
 
-    def _build_menu(self):
-        # File menu
-        self._menus["File"] = tk.Menu(self, tearoff = False, **self.styles)
-        self._add_quit(self._menus["File"])
-        self.add_cascade(label="File", menu=self._menus["File"])
+    # Declarative menu layout: (label, menu kwargs, item names).
+    # None for the kwargs means "use the class styles".  Platform
+    # subclasses override this table (and styles) instead of
+    # repeating _build_menu.
+    MENU_SPEC = (
+        ("File", None, ("quit",)),
+        ("Help", None, ("about",)),
+    )
 
-        # Help menu
-        self._menus["Help"] = tk.Menu(self, tearoff = False, **self.styles)
-        self._add_about(self._menus["Help"])
-        self.add_cascade(label="Help", menu=self._menus["Help"])
+    def _build_menu(self):
+        for (label, kwargs, items) in self.MENU_SPEC:
+            if kwargs is None:
+                kwargs = self.styles
+            menu = self._menus[label] = tk.Menu(self,
+                tearoff=False, **kwargs)
+            for item in items:
+                if item == "separator":
+                    menu.add_separator()
+                else:
+                    getattr(self, "_add_" + item)(menu)
+            self.add_cascade(label=label, menu=menu)
 
     def _event(self, sequence):
         def callback(*_):
@@ -997,7 +1491,7 @@ class GenericMainMenu(tk.Menu):
         )
 
     def _bind_accelerators(self):
-        for key, sequence in self.keybinds.items():
+        for (key, sequence) in self.keybinds:
             self.bind_all(key, self._event(sequence))
 
     def show_about(self):
@@ -1017,20 +1511,12 @@ class LinuxMainMenu(GenericMainMenu):
         "relief": tk.GROOVE
     }
 
-    def _build_menu(self):
-        # File menu
-        self._menus["File"] = tk.Menu(self, tearoff = False, **self.styles)
-        self._add_quit(self._menus["File"])
-        self.add_cascade(label="File", menu=self._menus["File"])
-
-        # Help menu
-        self._menus["Help"] = tk.Menu(self, tearoff = False, **self.styles)
-        self._add_about(self._menus["Help"])
-        self.add_cascade(label="Help", menu=self._menus["Help"])
-
 class WindowsMainMenu(GenericMainMenu):
     def __init__(self, *args, **kwargs):
-        del self.keybinds["<Control-q>"]
+        # drop the binding on this instance only; the old code deleted
+        # it from the shared class dict, which broke the second window
+        self.keybinds = tuple((k, s) for (k, s) in type(self).keybinds
+            if k != "<Control-q>")
         super().__init__(*args, **kwargs)
 
     def _add_quit(self,menu):
@@ -1040,20 +1526,8 @@ class WindowsMainMenu(GenericMainMenu):
             compound=tk.LEFT
         )
 
-    def _build_menu(self):
-        # File menu
-        self._menus["File"] = tk.Menu(self, tearoff = False)
-        self._add_quit(self._menus["File"])
-        self.add_cascade(label="File", menu=self._menus["File"])
-
-        # Help menu
-        self._menus["Help"] = tk.Menu(self, tearoff = False, **self.styles)
-        self._add_about(self._menus["Help"])
-        self.add_cascade(label="Help", menu=self._menus["Help"])
-
 class MacOsMainMenu(GenericMainMenu):
-    keybinds = {
-    }
+    keybinds = ()
     accelerators = {
     }
     styles = {
@@ -1063,20 +1537,11 @@ class MacOsMainMenu(GenericMainMenu):
         "activeforeground": "white",
         "relief": tk.GROOVE
     }
-
-    def _build_menu(self):
-        # App Menu
-        self._menus["App"] = tk.Menu(self, tearoff=False, name="apple")
-        self._add_about(self._menus["App"])
-        self._menus["App"].add_separator()
-
-        # File menu
-        self._menus["File"] = tk.Menu(self, tearoff = False, **self.styles)
-        self.add_cascade(label="File", menu=self._menus["File"])
-
-        # Help menu
-        self._menus["Help"] = tk.Menu(self, tearoff = False, **self.styles)
-        self.add_cascade(label="Help", menu=self._menus["Help"])
+    MENU_SPEC = (
+        ("App", {"name": "apple"}, ("about", "separator")),
+        ("File", None, ()),
+        ("Help", None, ()),
+    )
 
 def main():
     import argparse
@@ -1096,7 +1561,9 @@ def main():
 
     if args.logfile is not None:
         try:
-            app.log = open(args.logfile,"w")
+            # a fat buffer: the generators can log an event per cell
+            # and line buffering would mean a syscall for each
+            app.log = open(args.logfile, "w", buffering=1 << 16)
         except Exception:
             # Silently ignore errors
             app.log = None
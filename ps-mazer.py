@@ -1,14 +1,24 @@
 # vim: ts=4 sw=4 expandtab
 
 from pyscript import document, display
-from pyodide.ffi import create_proxy
+from pyodide.ffi import create_proxy, to_js
+from js import ImageData, OffscreenCanvas, Path2D, Uint8ClampedArray, window
 from datetime import datetime
+from itertools import repeat
 import secrets
 from enum import Enum, auto
 import numpy as np
 
 from maze import Maze
 
+def coord_table(count):
+    # pixel offset of each cell interior, built in place so the
+    # arange is the only array the computation touches
+    table = np.arange(count, dtype=np.int32)
+    table *= SPACING
+    table += ORIGIN
+    return table
+
 class State(Enum):
     INITIAL = auto()
     CLEARED = auto()
@@ -17,6 +27,16 @@ class State(Enum):
     SOLVING = auto()
     SOLVED = auto()
 
+# disabled flags for the (clear, generate, solve) buttons per state
+STATE_TABLE = {
+    State.INITIAL: (False, False, True),
+    State.CLEARED: (False, False, True),
+    State.GENERATING: (True, True, True),
+    State.GENERATED: (False, False, False),
+    State.SOLVING: (True, True, True),
+    State.SOLVED: (False, False, False),
+}
+
 DEF_WIDTH = 10           # number of cells
 DEF_HEIGHT = 10
 DEF_LEVELS = 1
@@ -24,18 +44,22 @@ CELL_SIZE = 30           # width of a cell
 WALL_THICK = 3           # thickness of wall
 ARROW_THICK = 1
 SPACING = CELL_SIZE + WALL_THICK
+ORIGIN = WALL_THICK - 1      # pixel offset of the first cell interior
 HALF_CELL = int(CELL_SIZE // 2)
 ARROW_LEN = int(CELL_SIZE // 3)
-COLOR_WALL = 'black'
-COLOR_BLOCK = 'black'
-COLOR_START = 'lime'
-COLOR_END = 'red'
-COLOR_ARROW = 'black'
-COLOR_WALK = 'orange'
-COLOR_LOOP = 'yellow'
-COLOR_CLEAR = 'gray40'
-COLOR_DEAD = 'gray50'
-COLOR_SOLUTION = 'cyan'
+# Canonical hex values: the browser's fillStyle parser has a fast
+# path for them, and the Tk-style grayNN names the desktop GUI uses
+# are not CSS colors at all -- 'gray40' silently paints nothing here.
+COLOR_WALL = '#000000'
+COLOR_BLOCK = '#000000'
+COLOR_START = '#00ff00'
+COLOR_END = '#ff0000'
+COLOR_ARROW = '#000000'
+COLOR_WALK = '#ffa500'
+COLOR_LOOP = '#ffff00'
+COLOR_CLEAR = '#666666'
+COLOR_DEAD = '#7f7f7f'
+COLOR_SOLUTION = '#00ffff'
 
 class App():
     def __init__(self):
@@ -46,9 +70,29 @@ class App():
         self.maze = Maze(self.shape)
         self.clear_button = None
         self.generate_button = None
-        self.generate_button = None
+        self.solve_button = None
         self.width_input = None
         self.height_input = None
+        self.canvas = None
+        self.ctx = None
+        self._proxies = dict()
+        # pixel origin of each cell column/row (SoA); rebuilt by
+        # draw_grid whenever the maze is resized
+        self.PX = coord_table(DEF_WIDTH)
+        self.PY = coord_table(DEF_HEIGHT)
+        # plain-int copies for the per-cell paths, so the hot calls
+        # hand the canvas native ints instead of numpy scalars
+        self.PXL = self.PX.tolist()
+        self.PYL = self.PY.tolist()
+        # cells changed since the last animation frame, as
+        # (x, y, style); painted in one flush per frame
+        self.dirty = []
+        self._raf_pending = False
+        self._raf_proxy = None
+        self._last_triple = None
+        # rgba mirror of the canvas; large dirty batches are painted
+        # here with numpy stores and pushed as one putImageData
+        self.pixel_buf = None
 
     # For efficiency a 3D maze with only one level is best handled as
     # if it is a 2D maze.  This accepts a tuple or list and returns a
@@ -74,134 +118,338 @@ class App():
             self.generate_button = document.getElementById("generate_button")
         if self.solve_button is None:
             self.solve_button = document.getElementById("solve_button")
+        if self.canvas is None:
+            self.canvas = document.getElementById("maze")
+            self.ctx = self.canvas.getContext("2d")
+
+    def register_events(self):
+        # Bind each handler exactly once and keep the proxies.  A
+        # module re-run that calls create_proxy at top level leaks the
+        # old proxies in pyodide's object table and stacks listeners
+        # on the buttons.
+        self.fetch_elements()
+        for (name, element, handler) in (
+            ("clear", self.clear_button, on_clear),
+            ("generate", self.generate_button, on_generate),
+            ("solve", self.solve_button, on_solve),
+        ):
+            if name in self._proxies:
+                continue
+            proxy = create_proxy(handler)
+            self._proxies[name] = ((element,), "click", proxy)
+            element.addEventListener("click", proxy)
+        # Dimension fields: parse once per edit instead of once per
+        # click; garbage typed mid-edit keeps the previous value.
+        for name in ("width", "height"):
+            if name in self._proxies:
+                continue
+            element = getattr(self, name + "_input")
+            setattr(self, name, int(element.value))
+            def edited(event, name=name):
+                try:
+                    setattr(self, name, int(event.target.value))
+                except ValueError:
+                    pass
+            proxy = create_proxy(edited)
+            element.addEventListener("change", proxy)
+            self._proxies[name] = ((element,), "change", proxy)
+        # Radio groups: follow the selection from change events so the
+        # click handlers read a plain attribute instead of running a
+        # css selector query across the DOM per click.
+        for group in ("generator", "solver"):
+            if group in self._proxies:
+                continue
+            checked = document.querySelector(f"[name='{group}']:checked")
+            setattr(self, group + "_choice",
+                None if checked is None else checked.value)
+            def changed(event, group=group):
+                setattr(self, group + "_choice", event.target.value)
+            proxy = create_proxy(changed)
+            radios = tuple(document.querySelectorAll(f"[name='{group}']"))
+            for radio in radios:
+                radio.addEventListener("change", proxy)
+            self._proxies[group] = (radios, "change", proxy)
+        if self._raf_proxy is None:
+            self._raf_proxy = create_proxy(self.flush_dirty)
+
+    def mark_dirty(self, x, y, style):
+        # Solver and generator callbacks push changed cells here; the
+        # requestAnimationFrame flush paints them, so the per-frame
+        # FFI traffic is proportional to what changed rather than to
+        # the size of the maze.
+        self.dirty.append((x, y, style))
+        if not self._raf_pending and self._raf_proxy is not None:
+            self._raf_pending = True
+            window.requestAnimationFrame(self._raf_proxy)
+
+    def mark_dirty_many(self, xs, ys, style):
+        # bulk mark_dirty for coordinate arrays; tolist keeps the
+        # zip on plain ints
+        self.dirty.extend(zip(xs.tolist(), ys.tolist(), repeat(style)))
+        if not self._raf_pending and self._raf_proxy is not None:
+            self._raf_pending = True
+            window.requestAnimationFrame(self._raf_proxy)
+
+    def flush_dirty(self, *args):
+        self._raf_pending = False
+        dirty = self.dirty
+        self.dirty = []
+        if not dirty:
+            return
+        self.fetch_elements()
+        ctx = self.ctx
+        (PX, PY) = (self.PX, self.PY)
+        (PXL, PYL) = (self.PXL, self.PYL)
+        side = CELL_SIZE - 1
+        buf = self.pixel_buf
+        if buf is not None:
+            # keep the mirror current whatever path paints the frame
+            for (x, y, style) in dirty:
+                rgba = COLOR_RGBA.get(style, (0, 0, 0, 255))
+                (px, py) = (PX[x], PY[y])
+                buf[py:py + side, px:px + side] = rgba
+            if len(dirty) > 64:
+                # a big batch is cheaper as one whole-frame blit than
+                # as thousands of rects
+                blit_buf(ctx)
+                return
+        # Bucket by color: the rectangles of each color accumulate in
+        # a Path2D on the js side, so a frame costs one fillStyle
+        # write and one fill call per distinct color.
+        buckets = dict()
+        for (x, y, style) in dirty:
+            buckets.setdefault(style, []).append((x, y))
+        for (style, cells) in buckets.items():
+            path = Path2D.new()
+            for (x, y) in cells:
+                path.rect(PXL[x], PYL[y], side, side)
+            ctx.fillStyle = style
+            ctx.fill(path)
+
+    def close(self):
+        for (elements, event, proxy) in self._proxies.values():
+            for element in elements:
+                element.removeEventListener(event, proxy)
+            proxy.destroy()
+        self._proxies.clear()
+        if self._raf_proxy is not None:
+            self._raf_proxy.destroy()
+            self._raf_proxy = None
 
     def update_states(self):
         self.fetch_elements()
-        print(f"before: {clear_button.getAttribute('disabled') = }")
-        print(f"before: {generate_button.getAttribute('disabled') = }")
-        print(f"before: {solve_button.getAttribute('disabled') = }")
-        match self.state:
-            case State.INITIAL | State.CLEARED:
-                clear_button.setAttribute("disabled",False)
-                generate_button.setAttribute("disabled",False)
-                solve_button.setAttribute("disabled",True)
-            case State.GENERATING:
-                clear_button.setAttribute("disabled",True)
-                generate_button.setAttribute("disabled",True)
-                solve_button.setAttribute("disabled",True)
-            case State.GENERATED:
-                clear_button.setAttribute("disabled",False)
-                generate_button.setAttribute("disabled",False)
-                solve_button.setAttribute("disabled",False)
-            case State.SOLVING:
-                clear_button.setAttribute("disabled",True)
-                generate_button.setAttribute("disabled",True)
-                solve_button.setAttribute("disabled",True)
-            case State.SOLVED:
-                clear_button.setAttribute("disabled",False)
-                generate_button.setAttribute("disabled",False)
-                solve_button.setAttribute("disabled",False)
-        print(f"after: {clear_button.getAttribute('disabled') = }")
-        print(f"after: {generate_button.getAttribute('disabled') = }")
-        print(f"after: {solve_button.getAttribute('disabled') = }")
+        triple = STATE_TABLE[self.state]
+        last = self._last_triple
+        if triple == last:
+            return
+        if last is None:
+            last = (None, None, None)
+        # only touch the buttons whose flag actually changed
+        buttons = (self.clear_button, self.generate_button,
+            self.solve_button)
+        for (button, disabled, was) in zip(buttons, triple, last):
+            if disabled != was:
+                button.setAttribute("disabled", disabled)
+        self._last_triple = triple
 
 # instantiate the application
 app = App()
 
 def draw_maze(ctx, width, height):
-    clear_maze(ctx, width, height)
+    # no clear_maze first: draw_grid resizes the canvas (which clears
+    # it in the browser) and its putImageData covers every pixel
     draw_grid(ctx, width, height, COLOR_WALL)
 
+# One pre-filled square per color, rendered on first use.  Blitting a
+# template with drawImage skips the fillStyle state change that the
+# 2D context charges for on every interleaved color switch.
+_cell_templates = dict()
+
+def cell_template(style):
+    tmpl = _cell_templates.get(style)
+    if tmpl is None:
+        tmpl = OffscreenCanvas.new(CELL_SIZE - 1, CELL_SIZE - 1)
+        tctx = tmpl.getContext("2d")
+        tctx.fillStyle = style
+        tctx.fillRect(0, 0, CELL_SIZE - 1, CELL_SIZE - 1)
+        _cell_templates[style] = tmpl
+    return tmpl
+
+# Per-style painters with the template already bound, so the hot call
+# is one dict hit and one FFI crossing with nothing to convert.
+_cell_painters = dict()
+
+def cell_painter(style):
+    painter = _cell_painters.get(style)
+    if painter is None:
+        tmpl = cell_template(style)
+        def painter(ctx, x, y, tmpl=tmpl):
+            ctx.drawImage(tmpl, app.PXL[x], app.PYL[y])
+        _cell_painters[style] = painter
+    return painter
+
 def draw_cell(ctx, x, y, style):
-    ctx.fillStyle = style
-    ctx.fillRect(x * SPACING + WALL_THICK - 1,
-        y * SPACING + WALL_THICK - 1,
-        CELL_SIZE - 1,
-        CELL_SIZE - 1)
+    cell_painter(style)(ctx, x, y)
     
 def clear_maze(ctx, width, height):
-    # clear the current area
-    ctx.clearRect(0, 0, ctx.canvas.width, ctx.canvas.height)
-    # now set the new size
-    ctx.canvas.width = width
-    ctx.canvas.height = height
+    # width/height are in cells.  A single assignment of the pixel
+    # dimensions both resizes the canvas and clears its bitmap, so no
+    # separate clearRect is needed (the old code also resized to the
+    # raw cell counts, leaving a canvas a few pixels wide).
+    ctx.canvas.width = width * SPACING + ORIGIN
+    ctx.canvas.height = height * SPACING + ORIGIN
+    app.pixel_buf = None
     
+# hex -> rgba for the numpy drawing path, one entry per palette color
+COLOR_RGBA = {
+    color: (int(color[1:3], 16), int(color[3:5], 16),
+        int(color[5:7], 16), 255)
+    for color in (COLOR_WALL, COLOR_START, COLOR_END, COLOR_WALK,
+        COLOR_LOOP, COLOR_CLEAR, COLOR_DEAD, COLOR_SOLUTION)
+}
+
+# The rendered grid for the current size; clear and generate redraw
+# the same pixels over and over, so the ImageData is kept and blitted
+# until the dimensions or style change.
+_grid_cache = dict()
+
 def draw_grid(ctx, width, height, style):
-    maxx = width * SPACING + WALL_THICK - 1
-    maxy = height * SPACING + WALL_THICK - 1
+    maxx = width * SPACING + ORIGIN
+    maxy = height * SPACING + ORIGIN
     ctx.canvas.width = maxx
     ctx.canvas.height = maxy
-    for x in range(0, maxx, SPACING):
-        draw_vert(ctx, x, 0, maxy, WALL_THICK, style)
-    for y in range(0, maxy, SPACING):
-        draw_horz(ctx, y, 0, maxx, WALL_THICK, style)
-
-def draw_vert(ctx, x, miny, maxy, thick, style):
-    ctx.beginPath()
-    ctx.lineWidth = thick
-    ctx.moveTo(x, miny)
-    ctx.lineTo(x, maxy)
-    ctx.strokeStyle = style
-    ctx.stroke()
-
-def draw_horz(ctx, y, minx, maxx, thick, style):
-    ctx.beginPath()
-    ctx.lineWidth = thick
-    ctx.moveTo(minx, y)
-    ctx.lineTo(maxx, y)
-    ctx.strokeStyle = style
-    ctx.stroke()
+    app.PX = coord_table(width)
+    app.PY = coord_table(height)
+    app.PXL = app.PX.tolist()
+    app.PYL = app.PY.tolist()
+    key = (maxx, maxy, style)
+    entry = _grid_cache.get(key)
+    if entry is None:
+        # Build the whole grid in a numpy rgba buffer and push it
+        # across the FFI once.  Stroking each line separately spends
+        # more time shuttling calls between python and the canvas
+        # than drawing.
+        rgba = COLOR_RGBA.get(style, (0, 0, 0, 255))
+        arr = np.zeros((maxy, maxx, 4), dtype=np.uint8)
+        half = WALL_THICK // 2
+        for x in range(0, maxx, SPACING):
+            arr[:, max(x - half, 0):x - half + WALL_THICK] = rgba
+        for y in range(0, maxy, SPACING):
+            arr[max(y - half, 0):y - half + WALL_THICK, :] = rgba
+        data = Uint8ClampedArray.new(to_js(arr.tobytes()))
+        # the array rides along so batch cell painting can composite
+        # on top of the grid without reading pixels back
+        entry = (ImageData.new(data, maxx, maxy), arr)
+        _grid_cache.clear()            # only one size is ever live
+        _grid_cache[key] = entry
+    ctx.putImageData(entry[0], 0, 0)
+    # start the canvas mirror from the pristine grid
+    app.pixel_buf = entry[1].copy()
+
+def blit_buf(ctx):
+    # push the whole canvas mirror in one putImageData
+    buf = app.pixel_buf
+    (h, w) = buf.shape[:2]
+    data = Uint8ClampedArray.new(to_js(buf.tobytes()))
+    ctx.putImageData(ImageData.new(data, w, h), 0, 0)
+
+def render_maze(ctx, maze):
+    # Draw a generated maze in bulk.  The cell array is one packed
+    # bitmask per cell, so each direction's doors fall out of a single
+    # vectorized nonzero; the doors are punched through the grid walls
+    # in the canvas mirror with numpy stores, and the finished frame
+    # goes across the FFI as a single putImageData.
+    cells = np.asarray(maze.cells)
+    if cells.ndim == 3:
+        cells = cells[:, :, 0]
+    buf = app.pixel_buf
+    (PX, PY) = (app.PX, app.PY)
+    half = WALL_THICK // 2
+    side = CELL_SIZE - 1
+    for (dirbit, vertical, off) in (
+        (Maze.N, False, 0),
+        (Maze.S, False, 1),
+        (Maze.W, True, 0),
+        (Maze.E, True, 1),
+    ):
+        (xs, ys) = np.nonzero(cells & dirbit)
+        if not xs.size:
+            continue
+        if vertical:
+            # the wall band between cell x-1 and cell x
+            bands = ((xs + off) * SPACING - half).tolist()
+            tops = PY[ys].tolist()
+            for (x0, y0) in zip(bands, tops):
+                x0 = max(x0, 0)
+                buf[y0:y0 + side, x0:x0 + WALL_THICK] = 0
+        else:
+            bands = ((ys + off) * SPACING - half).tolist()
+            lefts = PX[xs].tolist()
+            for (x0, y0) in zip(lefts, bands):
+                y0 = max(y0, 0)
+                buf[y0:y0 + WALL_THICK, x0:x0 + side] = 0
+    blit_buf(ctx)
 
 def on_clear(*args):
     app.fetch_elements()
-    width = int(width_input.value)
-    height = int(height_input.value)
-    canvas = document.getElementById("maze")
-    ctx = canvas.getContext("2d")
-    clear_maze(ctx, width, height)
+    width = app.width
+    height = app.height
+    clear_maze(app.ctx, width, height)
     app.state = State.CLEARED
     app.update_states()
 
 def on_generate(*args):
     app.fetch_elements()
-    width = int(width_input.value)
-    height = int(height_input.value)
-    choice = document.querySelector("[name='generator']:checked").value
-    canvas = document.getElementById("maze")
-    ctx = canvas.getContext("2d")
+    width = app.width
+    height = app.height
+    choice = app.generator_choice
+    ctx = app.ctx
     draw_maze(ctx, width, height)
     app.state = State.GENERATING
     app.update_states()
-    # XXX: setup callbacks and generate
+    # XXX: no animation callbacks yet; generate quietly and render
+    # the result in one pass
+    app.shape = app.shape2d((width, height, DEF_LEVELS))
+    app.maze = Maze(app.shape)
+    if choice == "recursive":
+        app.maze.recursive_generate()
+    else:
+        app.maze.wilsons_generate()
+    render_maze(ctx, app.maze)
     app.state = State.GENERATED
     app.update_states()
 
 def on_solve(*args):
     app.fetch_elements()
-    width = int(width_input.value)
-    height = int(height_input.value)
-    choice = document.querySelector("[name='solver']:checked").value
-    canvas = document.getElementById("maze")
-    ctx = canvas.getContext("2d")
+    width = app.width
+    height = app.height
+    choice = app.solver_choice
     app.state = State.SOLVING
     app.update_states()
-    # XXX: setup callbacks and solve
-    for y in range(width):
-        for x in range(y % 2, height, 2):
-            draw_cell(ctx, x, y, COLOR_SOLUTION)
+    # XXX: no animation callbacks yet; solve quietly and queue the
+    # whole solution for the next frame's batched paint
+    if choice == "deadend":
+        app.maze.deadend_solve()
+    else:
+        app.maze.bfs_solve()
+    cells = np.asarray(app.maze.cells)
+    if cells.ndim == 3:
+        cells = cells[:, :, 0]
+    (xs, ys) = np.nonzero(cells & Maze.SOLUTION)
+    app.mark_dirty_many(xs, ys, COLOR_SOLUTION)
     app.state = State.SOLVED
     app.update_states()
 
-self.state = State.INITIAL
-
-clear_proxy = create_proxy(on_clear)
-element = document.getElementById("clear_button")
-element.addEventListener("click", clear_proxy)
-
-generate_proxy = create_proxy(on_generate)
-element = document.getElementById("generate_button")
-element.addEventListener("click", generate_proxy)
+def preload():
+    # Warm the lazy caches while the user is still looking at the
+    # page, so the first click doesn't pay for them: one template per
+    # palette color, and a throwaway generate/solve to pull in
+    # everything Maze touches on first use.
+    for style in COLOR_RGBA:
+        cell_template(style)
+    warm = Maze(app.shape2d((2, 2, DEF_LEVELS)))
+    warm.wilsons_generate()
+    warm.deadend_solve()
 
-solve_proxy = create_proxy(on_solve)
-element = document.getElementById("solve_button")
-element.addEventListener("click", solve_proxy)
+app.register_events()
+preload()